@@ -0,0 +1,249 @@
+"""Offline benchmarks for the ingestion and serving paths.
+
+Every stage runs against the local stand-ins in benchmarks/stand_ins.py at
+several scales (grid points x hours) and reports seconds, rows/s and memory.
+Run from the code/ directory:
+
+    python -m benchmarks.run_benchmarks --scales 100x24,1000x24,1000x168 --output bench.json
+
+Each (stage, scale) runs in a fresh spawned process, so peak_rss_mb is the
+peak of that stage alone (including the interpreter and imports). --memory
+additionally traces the peak Python/numpy allocation of each stage
+(tracemalloc), which slows the timed run down.
+"""
+import os
+import json
+import argparse
+import tempfile
+import multiprocessing
+import tracemalloc
+from time import perf_counter
+import numpy as np
+import pandas as pd
+
+from utils.Metrics import peak_rss_mb
+from benchmarks import stand_ins
+
+
+def process_dataframe(df: pd.DataFrame, convert_time: bool = False, coordinate_rounding: int = 3) -> pd.DataFrame:
+    """Same steps as process_dataframe in ocean-weather.py."""
+    float_cols = df.select_dtypes(include=["float"]).columns
+    df[float_cols] = df[float_cols].astype(np.float32)
+
+    df["latitude"] = df["latitude"].round(coordinate_rounding)
+    df["longitude"] = df["longitude"].round(coordinate_rounding)
+
+    if convert_time:
+        df["time"] = pd.to_datetime(df["time"]).dt.tz_localize(None).dt.round("h")
+
+    return df
+
+
+# ------------ Stages ------------
+# Each stage gets (points, hours, workdir) and returns a callable that runs the
+# measured work and returns the number of processed rows, or None to skip.
+
+def stage_copernicus_decode(points, hours, workdir):
+    import xarray as xr
+
+    path = stand_ins.synthetic_copernicus(points, hours, os.path.join(workdir, "copernicus.nc"))
+
+    def run():
+        with xr.open_dataset(path) as ds:
+            df = ds.to_dataframe().reset_index()
+        df = df[["time"] + [col for col in df.columns if col != "time"]]
+        df.dropna(subset=stand_ins.COPERNICUS_VARIABLES, how="all", inplace=True, axis=0)
+        df = process_dataframe(df, convert_time=True)
+        return len(df)
+    return run
+
+
+def stage_openmeteo_decode(points, hours, workdir):
+    from utils.OpenMeteoWeather import OpenMeteoWeather
+
+    responses = stand_ins.synthetic_open_meteo(points, hours)
+    # Skip __init__, which sets up the HTTP session; only the decoding is measured
+    weather = OpenMeteoWeather.__new__(OpenMeteoWeather)
+
+    def run():
+        return len(weather.process_weather_data(responses))
+    return run
+
+
+def stage_dedup_merge(points, hours, workdir):
+    df_new = stand_ins.synthetic_ocean_weather(points, hours)
+    # Half of the new rows already exist in the database
+    df_db = df_new.iloc[: len(df_new) // 2][["time", "latitude", "longitude"]].copy()
+
+    def run():
+        df = df_new.merge(df_db, on=["time", "latitude", "longitude"], how="left", indicator=True)
+        df = df[df["_merge"] == "left_only"].drop(columns=["_merge"])
+        return len(df_new)
+    return run
+
+
+def stage_upload_many(points, hours, workdir):
+    db = stand_ins.in_memory_database()
+    if db is None:
+        return None
+    records = stand_ins.synthetic_ocean_weather(points, hours).to_dict(orient="records")
+
+    def run():
+        db.collection.delete_many({})
+        db.upload_many([dict(r) for r in records])
+        return len(records)
+    return run
+
+
+def stage_ocean_data_serialise(points, hours, workdir):
+    df = stand_ins.synthetic_ocean_weather(points, hours)
+    try:
+        from fastapi.encoders import jsonable_encoder
+    except ImportError:
+        jsonable_encoder = None
+
+    def run():
+        records = df.to_dict(orient="records")
+        if jsonable_encoder is not None:
+            # What FastAPI does with the return value of /ocean_data
+            records = jsonable_encoder(records)
+        json.dumps(records, default=str)
+        return len(df)
+    return run
+
+
+def stage_frost_pages(points, hours, workdir):
+    from utils.frost_server import FrostServer
+
+    n = points * hours
+    server = stand_ins.FakeServer(frost_observations=n)
+    server.__enter__()
+    frost = FrostServer(url=server.url + "/FROST-Server/v1.1/", thing="Things(1)")
+
+    def run():
+        try:
+            return len(frost.get_all_observations(limit_per_page=1000))
+        finally:
+            server.__exit__()
+    return run
+
+
+def stage_horizons_convert_time(points, hours, workdir):
+    from utils.PlanetPositions import PlanetPositions
+
+    df = stand_ins.synthetic_horizons(hours)
+    pp = PlanetPositions(start_date="2025-01-01", stop_date="2025-01-02")
+
+    def run():
+        pp.df_all = df.copy()
+        pp.convert_time()
+        return len(pp.df_all)
+    return run
+
+
+def stage_insitu_mirror(points, hours, workdir):
+    from utils.InsituDownloader import InsituDownloader
+
+    files = stand_ins.synthetic_insitu_files(max(points // 50, 4), hours * 1024)
+    server = stand_ins.FakeServer(insitu_files=files)
+    server.__enter__()
+    target = os.path.join(workdir, "insitu")
+
+    def run():
+        try:
+            downloader = InsituDownloader(target_dir=target, base_url=server.url + "/insitu/history/")
+            counts = downloader.mirror(verbose=False)
+            # Second pass must be served from the conditional requests only
+            counts_warm = downloader.mirror(verbose=False)
+            downloader.close()
+            assert counts_warm["unchanged"] == len(files), counts_warm
+            return counts["downloaded"]
+        finally:
+            server.__exit__()
+    return run
+
+
+STAGES = {
+    "copernicus_decode": stage_copernicus_decode,
+    "openmeteo_decode": stage_openmeteo_decode,
+    "dedup_merge": stage_dedup_merge,
+    "upload_many": stage_upload_many,
+    "ocean_data_serialise": stage_ocean_data_serialise,
+    "frost_pages": stage_frost_pages,
+    "horizons_convert_time": stage_horizons_convert_time,
+    "insitu_mirror": stage_insitu_mirror,
+}
+
+
+# ------------ Runner ------------
+def measure(run, memory=False):
+    if memory:
+        tracemalloc.start()
+    start = perf_counter()
+    rows = run()
+    seconds = perf_counter() - start
+    peak_alloc_mb = None
+    if memory:
+        peak_alloc_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+    return {
+        "seconds": seconds,
+        "rows": rows,
+        "rows_per_s": rows / seconds if rows and seconds > 0 else None,
+        "peak_alloc_mb": peak_alloc_mb,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def parse_scales(text):
+    scales = []
+    for item in text.split(","):
+        points, hours = item.lower().split("x")
+        scales.append((int(points), int(hours)))
+    return scales
+
+
+def run_stage(name, points, hours, memory=False):
+    """Runs one stage in the current process; returns None if its stand-in is not available."""
+    with tempfile.TemporaryDirectory() as workdir:
+        run = STAGES[name](points, hours, workdir)
+        if run is None:
+            return None
+        return measure(run, memory=memory)
+
+
+def run_benchmarks(scales, stages=None, memory=False):
+    # spawn instead of fork, so no stage inherits the memory of the runner or of earlier stages
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for points, hours in scales:
+        for name in stages or STAGES:
+            with context.Pool(processes=1) as pool:
+                result = pool.apply(run_stage, (name, points, hours, memory))
+            if result is None:
+                print(f"{name:<24} {points:>6}x{hours:<5} skipped (stand-in not available)")
+                continue
+            result.update({"stage": name, "points": points, "hours": hours})
+            results.append(result)
+
+            rows_per_s = f"{result['rows_per_s']:>12,.0f} rows/s" if result["rows_per_s"] else " " * 19
+            alloc = f"  alloc {result['peak_alloc_mb']:8.1f} MB" if memory else ""
+            rss = f"  rss {result['peak_rss_mb']:8.1f} MB" if result["peak_rss_mb"] is not None else ""
+            print(f"{name:<24} {points:>6}x{hours:<5} {result['seconds']:9.3f} s {rows_per_s}{alloc}{rss}")
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="100x24,1000x24,1000x168", help="comma separated <grid points>x<hours>")
+    parser.add_argument("--stages", default=None, help=f"comma separated subset of {', '.join(STAGES)}")
+    parser.add_argument("--memory", action="store_true", help="trace peak allocations per stage")
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    args = parser.parse_args()
+
+    stages = args.stages.split(",") if args.stages else None
+    results = run_benchmarks(parse_scales(args.scales), stages=stages, memory=args.memory)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=4)
@@ -0,0 +1,299 @@
+"""Local stand-ins for the external services of the ingestion and serving paths.
+
+- FakeServer: threaded HTTP server with a FROST-Server API (paged JSON
+  observations) and an Ifremer-style directory tree with ETag/Range support
+- FakeOpenMeteoResponse: objects with the same accessors as openmeteo_requests
+  responses, so OpenMeteoWeather.process_weather_data can be timed offline
+- synthetic_copernicus / synthetic_ocean_weather / synthetic_horizons: generators in
+  place of copernicusmarine subsets, the ocean-weather collection and Horizons tables
+- in_memory_database: utils.Database on mongomock, or on a local mongod via BENCH_MONGO_URL
+"""
+import os
+import json
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from email.utils import formatdate
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+
+
+OPEN_METEO_VARIABLES = [
+    "temperature_2m", "relative_humidity_2m", "dew_point_2m", "apparent_temperature",
+    "precipitation_probability", "precipitation", "rain", "showers", "snowfall", "snow_depth",
+    "weather_code", "pressure_msl", "surface_pressure", "cloud_cover", "cloud_cover_low",
+    "cloud_cover_mid", "cloud_cover_high", "visibility", "evapotranspiration",
+    "et0_fao_evapotranspiration", "vapour_pressure_deficit", "wind_speed_10m", "wind_speed_80m",
+    "wind_speed_120m", "wind_speed_180m", "wind_direction_10m", "wind_direction_80m",
+    "wind_direction_120m", "wind_direction_180m", "wind_gusts_10m", "temperature_80m",
+    "temperature_120m", "temperature_180m", "soil_temperature_0cm", "soil_temperature_6cm",
+    "soil_temperature_18cm", "soil_temperature_54cm", "soil_moisture_0_to_1cm",
+    "soil_moisture_1_to_3cm", "soil_moisture_3_to_9cm", "soil_moisture_9_to_27cm",
+    "soil_moisture_27_to_81cm"
+]
+
+COPERNICUS_VARIABLES = ["bottomT", "mlotst", "siconc", "sithick", "sla", "so", "sob", "thetao", "uo", "vo", "wo"]
+
+
+def grid_shape(points):
+    """Lat/lon grid with roughly `points` cells."""
+    n_lat = max(int(np.sqrt(points)), 1)
+    n_lon = max(int(np.ceil(points / n_lat)), 1)
+    return n_lat, n_lon
+
+
+# ------------ HTTP Stand-in ------------
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeServer/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data):
+        self._send(200, json.dumps(data).encode(), {"Content-Type": "application/json"})
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        base = f"http://{self.server.server_address[0]}:{self.server.server_address[1]}"
+        frost = base + "/FROST-Server/v1.1/"
+
+        if url.path == "/FROST-Server/v1.1/Things(1)":
+            return self._json({
+                "name": "FakeStation",
+                "Datastreams@iot.navigationLink": frost + "Things(1)/Datastreams",
+                "Locations@iot.navigationLink": frost + "Things(1)/Locations",
+            })
+        if url.path == "/FROST-Server/v1.1/Things(1)/Datastreams":
+            return self._json({"value": [{"Observations@iot.navigationLink": frost + "Datastreams(1)/Observations"}]})
+        if url.path == "/FROST-Server/v1.1/Datastreams(1)/Observations":
+            return self._observations(query, frost)
+        if url.path.startswith("/insitu/"):
+            return self._insitu(url.path[len("/insitu/"):], base)
+        self._send(404)
+
+    def _observations(self, query, frost):
+        top = int(query.get("$top", ["1000"])[0])
+        skip = int(query.get("$skip", ["0"])[0])
+        total = self.server.frost_observations
+        start = pd.Timestamp("2025-01-01")
+        values = np.sin(np.arange(skip, min(skip + top, total)) / 50.0)
+        page = {
+            "value": [
+                {
+                    "phenomenonTime": (start + pd.Timedelta(minutes=skip + i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "resultTime": None,
+                    "result": float(v),
+                }
+                for i, v in enumerate(values)
+            ]
+        }
+        if skip + top < total:
+            page["@iot.nextLink"] = f"{frost}Datastreams(1)/Observations?$top={top}&$skip={skip + top}"
+        self._json(page)
+
+    def _insitu(self, path, base):
+        files = self.server.insitu_files
+        if path == "history/":
+            platforms = sorted({name.split("/")[0] + "/" for name in files})
+            return self._listing(platforms)
+        if path.endswith("/") and path.startswith("history/"):
+            platform = path[len("history/"):]
+            names = sorted(name.split("/")[1] for name in files if name.startswith(platform))
+            return self._listing(names)
+        if path == "index_history.txt":
+            lines = ["# catalog_id,file_name,lat_min,lat_max,lon_min,lon_max"]
+            for i, name in enumerate(sorted(files)):
+                lat, lon = 54.0 + i * 0.01, 10.0 + i * 0.01
+                lines.append(f"COP,{base}/insitu/history/{name},{lat},{lat},{lon},{lon}")
+            return self._send(200, ("\n".join(lines) + "\n").encode())
+
+        name = path[len("history/"):]
+        if name not in files:
+            return self._send(404)
+        body = files[name]
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        headers = {"ETag": etag, "Last-Modified": formatdate(self.server.started, usegmt=True), "Accept-Ranges": "bytes"}
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, headers=headers)
+        range_header = self.headers.get("Range")
+        if range_header and self.headers.get("If-Range") in (None, etag):
+            offset = int(range_header.split("=")[1].split("-")[0])
+            if offset >= len(body):
+                return self._send(416)
+            headers["Content-Range"] = f"bytes {offset}-{len(body) - 1}/{len(body)}"
+            return self._send(206, body[offset:], headers)
+        self._send(200, body, headers)
+
+    def _listing(self, links):
+        html = "<html><body>" + "".join(f'<a href="{link}">{link}</a>' for link in ["../"] + links) + "</body></html>"
+        self._send(200, html.encode(), {"Content-Type": "text/html"})
+
+
+class FakeServer():
+    """Runs the HTTP stand-in on a free localhost port in a background thread."""
+
+    def __init__(self, frost_observations=10_000, insitu_files=None):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.httpd.frost_observations = frost_observations
+        self.httpd.insitu_files = insitu_files or {}
+        self.httpd.started = pd.Timestamp.now().timestamp()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def synthetic_insitu_files(n_files, size_bytes, platforms=("TG/", "MO/")):
+    rng = np.random.default_rng(0)
+    return {
+        f"{platforms[i % len(platforms)]}NO_TS_{platforms[i % len(platforms)][:2]}_Station{i:04d}.nc":
+            rng.integers(0, 255, size_bytes, dtype=np.uint8).tobytes()
+        for i in range(n_files)
+    }
+
+
+# ------------ Open-Meteo Stand-in ------------
+class _FakeVariable():
+    def __init__(self, values):
+        self.values = values
+
+    def ValuesAsNumpy(self):
+        return self.values
+
+
+class _FakeHourly():
+    def __init__(self, start, hours, rng):
+        self.start = int(start.timestamp())
+        self.hours = hours
+        self.variables = [_FakeVariable(rng.standard_normal(hours).astype(np.float32)) for _ in OPEN_METEO_VARIABLES]
+
+    def Time(self):
+        return self.start
+
+    def TimeEnd(self):
+        return self.start + self.hours * 3600
+
+    def Interval(self):
+        return 3600
+
+    def Variables(self, idx):
+        return self.variables[idx]
+
+
+class FakeOpenMeteoResponse():
+    def __init__(self, start, hours, rng):
+        self.hourly = _FakeHourly(start, hours, rng)
+
+    def Hourly(self):
+        return self.hourly
+
+
+def synthetic_open_meteo(points, hours, start="2025-01-01"):
+    """Returns (lat, lon, response) tuples as collected by OpenMeteoWeather.fetch_weather_data."""
+    rng = np.random.default_rng(0)
+    n_lat, n_lon = grid_shape(points)
+    lats = np.round(np.linspace(54.0, 55.0, n_lat), 3)
+    lons = np.round(np.linspace(10.0, 11.0, n_lon), 3)
+    coords = [(lat, lon) for lat in lats for lon in lons][:points]
+    return [(lat, lon, FakeOpenMeteoResponse(pd.Timestamp(start), hours, rng)) for lat, lon in coords]
+
+
+# ------------ Copernicus / Horizons / Mongo Stand-ins ------------
+def synthetic_copernicus(points, hours, path, start="2025-01-01", land_fraction=0.3):
+    """Writes a NetCDF file shaped like an AdvancedCopernicus.get_subset result and returns its path."""
+    import xarray as xr
+
+    rng = np.random.default_rng(0)
+    n_lat, n_lon = grid_shape(points)
+    shape = (hours, 1, n_lat, n_lon)
+    land = rng.random((n_lat, n_lon)) < land_fraction
+    data_vars = {}
+    for var in COPERNICUS_VARIABLES:
+        values = rng.standard_normal(shape).astype(np.float32)
+        values[:, :, land] = np.nan
+        data_vars[var] = (("time", "depth", "latitude", "longitude"), values)
+    ds = xr.Dataset(
+        data_vars,
+        coords={
+            "time": pd.date_range(start, periods=hours, freq="h"),
+            "depth": [0.5016462206840515],
+            "latitude": np.linspace(54.0, 55.0, n_lat),
+            "longitude": np.linspace(10.0, 11.0, n_lon),
+        },
+    )
+    ds.to_netcdf(path)
+    return path
+
+
+def synthetic_ocean_weather(points, hours, start="2025-01-01"):
+    """Long-format rows like the ocean-weather collection (Copernicus + a few Open-Meteo columns)."""
+    rng = np.random.default_rng(0)
+    n_lat, n_lon = grid_shape(points)
+    t, lat, lon = np.meshgrid(
+        pd.date_range(start, periods=hours, freq="h"),
+        np.round(np.linspace(54.0, 55.0, n_lat), 3),
+        np.round(np.linspace(10.0, 11.0, n_lon), 3),
+        indexing="ij",
+    )
+    n = t.size
+    df = pd.DataFrame({"time": t.ravel(), "latitude": lat.ravel().astype(np.float32), "longitude": lon.ravel().astype(np.float32)})
+    for var in COPERNICUS_VARIABLES + OPEN_METEO_VARIABLES[:4]:
+        df[var] = rng.standard_normal(n).astype(np.float32)
+    return df
+
+
+def synthetic_horizons(hours, start="2025-01-01"):
+    """PlanetPositions.df_all as returned by Horizons, before convert_time."""
+    planets = ["Mercury", "Venus", "Earth", "Mars", "Jupiter", "Saturn", "Uranus", "Neptune", "Moon"]
+    jd = pd.Timestamp(start).to_julian_date() + np.arange(hours) / 24.0
+    rng = np.random.default_rng(0)
+    frames = []
+    for planet in planets:
+        frames.append(pd.DataFrame({
+            "targetname": planet,
+            "datetime_jd": jd,
+            "x": rng.standard_normal(hours), "y": rng.standard_normal(hours), "z": rng.standard_normal(hours),
+            "planet": planet,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def in_memory_database(collection_name="benchmark"):
+    """utils.Database backed by mongomock, or by a local mongod if BENCH_MONGO_URL is set; None if neither."""
+    from utils.Database import Database
+
+    if os.getenv("BENCH_MONGO_URL"):
+        db = Database(db_url=os.getenv("BENCH_MONGO_URL"), db_name="benchmark", collection_name=collection_name)
+        db.collection.drop()
+        return db
+    try:
+        import mongomock
+    except ImportError:
+        return None
+    # Same object as utils.Database, only the client is replaced
+    db = Database.__new__(Database)
+    db.db_url, db.port, db.db_name, db.collection_name = "mongomock", "27017", "benchmark", collection_name
+    db.client = mongomock.MongoClient()
+    db.db = db.client[db.db_name]
+    db.collection = db.db[collection_name]
+    return db
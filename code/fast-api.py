@@ -1,8 +1,12 @@
 # %%
 import fastapi
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 import pandas as pd
 import numpy as np
 from utils.Database import Database
+from utils.Metrics import METRICS, stage_timer
+from time import perf_counter
 import os
 import json
 from dotenv import load_dotenv
@@ -30,6 +34,14 @@ DB_CONFIG = {
     "collection": os.getenv("DB_COLLECTION_OCEAN_WEATHER")
 }
 
+# Forecast model (optional); saved with torch.save or as TorchScript, grid and scaling from the training cube
+FORECAST_CONFIG = {
+    "model_path": os.getenv("FORECAST_MODEL_PATH"),
+    "cube_path": os.getenv("FORECAST_CUBE_PATH"),
+    "input_size": int(os.getenv("FORECAST_INPUT_SIZE", 48)),
+    "num_threads": int(os.getenv("FORECAST_NUM_THREADS", os.cpu_count() or 1)),
+}
+
 
 
 db = Database(
@@ -38,7 +50,9 @@ db = Database(
     collection_name=DB_CONFIG["collection"]
     )
 
-db_data_all = db.get_all_data(key="time")
+with stage_timer("db_read", verbose=True) as timer:
+    db_data_all = db.get_all_data(key="time")
+    timer.rows = len(db_data_all)
 db.close_connection()
 
 df_db = pd.DataFrame(db_data_all).drop(columns=["_id"])
@@ -70,24 +84,70 @@ def process_dataframe(df: pd.DataFrame, convert_time: bool = False, drop_duplica
 
 # %%
 print(df_db.shape)
-df_cleaned = process_dataframe(df_db, convert_time=True, drop_duplicates=True, reorder=True)
-df_cleaned = df_cleaned.dropna(axis=1, how='all')
+with stage_timer("process_dataframe", rows=len(df_db), verbose=True):
+    df_cleaned = process_dataframe(df_db, convert_time=True, drop_duplicates=True, reorder=True)
+    df_cleaned = df_cleaned.dropna(axis=1, how='all')
 display(df_cleaned.info())
 
 # %%
 df_cleaned
 
+# %%
+forecast_service = None
+if FORECAST_CONFIG["model_path"] and FORECAST_CONFIG["cube_path"]:
+    # Imported here so the raw-data API does not need torch
+    from utils.Forecast import ForecastService
+
+    forecast_service = ForecastService(
+        model_path=FORECAST_CONFIG["model_path"],
+        cube_path=FORECAST_CONFIG["cube_path"],
+        input_size=FORECAST_CONFIG["input_size"],
+        num_threads=FORECAST_CONFIG["num_threads"],
+        coordinate_rounding=COORDINATE_ROUNDING,
+    )
+    forecast_service.set_data(df_cleaned)
+
 # %%
 
 # fast api
 app = fastapi.FastAPI()
 
+@app.middleware("http")
+async def record_request_time(request: fastapi.Request, call_next):
+    start = perf_counter()
+    response = await call_next(request)
+    # Key by the route template, not the raw path, so unmatched or parametrised paths do not grow the registry
+    route = request.scope.get("route")
+    if route is not None:
+        METRICS.record(f"http {request.method} {route.path}", perf_counter() - start)
+    return response
+
 @app.get("/")
 def read_root():
     return {"Hello": "World"}
 
 @app.get("/ocean_data")
 def read_data():
-    return df_cleaned.to_dict(orient="records")
-
-
+    # Encode and render inside the timer; returning a Response skips FastAPI's own encoding
+    with stage_timer("ocean_data_serialise", rows=len(df_cleaned)):
+        content = jsonable_encoder(df_cleaned.to_dict(orient="records"))
+        response = JSONResponse(content=content)
+    return response
+
+@app.get("/forecast")
+async def read_forecast(time: str = None):
+    if forecast_service is None:
+        raise fastapi.HTTPException(status_code=503, detail="No forecast model configured")
+    try:
+        return await forecast_service.forecast_async(time)
+    except ValueError as e:
+        raise fastapi.HTTPException(status_code=400, detail=str(e))
+
+@app.get("/metrics")
+def read_metrics():
+    return METRICS.summary()
+
+@app.on_event("shutdown")
+def shutdown_forecast():
+    if forecast_service is not None:
+        forecast_service.close()
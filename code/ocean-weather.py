@@ -1,6 +1,8 @@
 from utils.Database import Database
 from utils.Copernicus import AdvancedCopernicus
 from utils.OpenMeteoWeather import OpenMeteoWeather
+from utils.Archive import Archive
+from utils.Metrics import METRICS, stage_timer
 import pandas as pd
 import numpy as np
 import datetime
@@ -32,6 +34,9 @@ DB_CONFIG = {
     "name": os.getenv("DB_NAME"),
     "collection": os.getenv("DB_COLLECTION_OCEAN_WEATHER")
 }
+
+# Optional Parquet archive written alongside MongoDB for offline ML jobs
+ARCHIVE_ROOT = os.getenv("ARCHIVE_ROOT")
 ### Display Settings ###
 print("\n\n")
 print(ABSOLUTE_END_DATE, START_DATE, END_DATE)
@@ -57,44 +62,51 @@ def process_dataframe(df: pd.DataFrame, convert_time: bool = False) -> pd.DataFr
 # ------------ Fetch Data from AdvancedCopernicus ------------
 print("\nFetching data from AdvancedCopernicus...\n")
 copernicus = AdvancedCopernicus()
-copernicus_data = copernicus.get_subset(
-    dataset_id="cmems_mod_bal_phy_anfc_PT1H-i",
-    dataset_version="202411",
-    variables=["bottomT", "mlotst", "siconc", "sithick", "sla", "so", "sob", "thetao", "uo", "vo", "wo"],
-    minimum_longitude=BBOX["min_lon"],
-    maximum_longitude=BBOX["max_lon"],
-    minimum_latitude=BBOX["min_lat"],
-    maximum_latitude=BBOX["max_lat"],
-    start_datetime=START_DATE,
-    end_datetime=END_DATE,
-    minimum_depth=0.5016462206840515,
-    maximum_depth=0.5016462206840515,
-    coordinates_selection_method="strict-inside",
-    disable_progress_bar=False,
-    output_filename=OUTPUT_FILENAME
-)
-
-df_copernicus = copernicus_data.to_dataframe().reset_index()
-df_copernicus = df_copernicus[["time"] + [col for col in df_copernicus.columns if col != "time"]]
-
-# Remove rows where all key variables are NaN
-key_vars = ["bottomT", "mlotst", "siconc", "sithick", "sla", "so", "sob", "thetao", "uo", "vo", "wo"]
-df_copernicus.dropna(subset=key_vars, how="all", inplace=True, axis=0)
-df_copernicus = process_dataframe(df_copernicus, convert_time=True)
+with stage_timer("copernicus_download", verbose=True):
+    copernicus_data = copernicus.get_subset(
+        dataset_id="cmems_mod_bal_phy_anfc_PT1H-i",
+        dataset_version="202411",
+        variables=["bottomT", "mlotst", "siconc", "sithick", "sla", "so", "sob", "thetao", "uo", "vo", "wo"],
+        minimum_longitude=BBOX["min_lon"],
+        maximum_longitude=BBOX["max_lon"],
+        minimum_latitude=BBOX["min_lat"],
+        maximum_latitude=BBOX["max_lat"],
+        start_datetime=START_DATE,
+        end_datetime=END_DATE,
+        minimum_depth=0.5016462206840515,
+        maximum_depth=0.5016462206840515,
+        coordinates_selection_method="strict-inside",
+        disable_progress_bar=False,
+        output_filename=OUTPUT_FILENAME
+    )
+
+with stage_timer("copernicus_decode", verbose=True) as timer:
+    df_copernicus = copernicus_data.to_dataframe().reset_index()
+    df_copernicus = df_copernicus[["time"] + [col for col in df_copernicus.columns if col != "time"]]
+
+    # Remove rows where all key variables are NaN
+    key_vars = ["bottomT", "mlotst", "siconc", "sithick", "sla", "so", "sob", "thetao", "uo", "vo", "wo"]
+    df_copernicus.dropna(subset=key_vars, how="all", inplace=True, axis=0)
+    df_copernicus = process_dataframe(df_copernicus, convert_time=True)
+    timer.rows = len(df_copernicus)
 
 # ------------ Fetch Existing Data from Database ------------
 db = Database(db_url=DB_CONFIG["url"], db_name=DB_CONFIG["name"], collection_name=DB_CONFIG["collection"])
-db_data_all = db.get_all_data(key="time")
+with stage_timer("db_read", verbose=True) as timer:
+    db_data_all = db.get_all_data(key="time")
+    timer.rows = len(db_data_all)
 db.close_connection()
 
 if db_data_all:
-    df_db = pd.DataFrame(db_data_all).drop(columns=["_id"])[["time", "latitude", "longitude"]]
-    df_db = process_dataframe(df_db, convert_time=True)
-    len_before = len(df_copernicus)
-    # Use a performant merge operation instead of looping
-    df_copernicus = df_copernicus.merge(df_db, on=["time", "latitude", "longitude"], how="left", indicator=True)
-    df_copernicus = df_copernicus[df_copernicus["_merge"] == "left_only"].drop(columns=["_merge"])
-    len_after = len(df_copernicus)
+    with stage_timer("dedup_merge", verbose=True) as timer:
+        df_db = pd.DataFrame(db_data_all).drop(columns=["_id"])[["time", "latitude", "longitude"]]
+        df_db = process_dataframe(df_db, convert_time=True)
+        len_before = len(df_copernicus)
+        # Use a performant merge operation instead of looping
+        df_copernicus = df_copernicus.merge(df_db, on=["time", "latitude", "longitude"], how="left", indicator=True)
+        df_copernicus = df_copernicus[df_copernicus["_merge"] == "left_only"].drop(columns=["_merge"])
+        len_after = len(df_copernicus)
+        timer.rows = len_before
     print(f"\nRemoved {len_before - len_after} existing records from the Copernicus data")
     print(f"Reduced data: {len(df_copernicus)} rows\n")
 
@@ -108,6 +120,7 @@ latitudes, longitudes = zip(*lat_lon_list)
 print(f"\nUnique locations: {len(lat_lon_list)}, Unique times: {len(unique_times)}\n")
 
 db = Database(db_url=DB_CONFIG["url"], db_name=DB_CONFIG["name"], collection_name=DB_CONFIG["collection"])
+archive = Archive(root=ARCHIVE_ROOT, source=DB_CONFIG["collection"]) if ARCHIVE_ROOT else None
 
 NUM_BATCHES = 30
 for i in tqdm(range(0, len(unique_times), NUM_BATCHES), desc="\nUploading data to the database", total=len(unique_times) // NUM_BATCHES):
@@ -125,14 +138,25 @@ for i in tqdm(range(0, len(unique_times), NUM_BATCHES), desc="\nUploading data t
         start_date=time_str,
         end_date=time_str
     )
-    df_openweather = open_meteo_weather.get_weather_dataframe()
-    df_openweather = df_openweather[["time"] + [col for col in df_openweather.columns if col != "time"]]
-    df_openweather = process_dataframe(df_openweather, convert_time=True)
-
-    df_merged = pd.merge(df_copernicus, df_openweather, on=["time", "latitude", "longitude"], how="inner")
+    with stage_timer("openmeteo_fetch") as timer:
+        df_openweather = open_meteo_weather.get_weather_dataframe()
+        df_openweather = df_openweather[["time"] + [col for col in df_openweather.columns if col != "time"]]
+        df_openweather = process_dataframe(df_openweather, convert_time=True)
+        timer.rows = len(df_openweather)
+
+    with stage_timer("weather_merge") as timer:
+        df_merged = pd.merge(df_copernicus, df_openweather, on=["time", "latitude", "longitude"], how="inner")
+        timer.rows = len(df_merged)
     if not df_merged.empty:
-        db.upload_many(df_merged.to_dict(orient="records"))
+        with stage_timer("upload_many", rows=len(df_merged)):
+            db.upload_many(df_merged.to_dict(orient="records"))
+        if archive is not None:
+            with stage_timer("archive_upload", rows=len(df_merged)):
+                archive.upload_many(df_merged)
         print(f"Uploaded {len(df_merged)} records to the database\n")
     # if i >= 10:
     #     break
 db.close_connection()
+
+print("\nStage metrics:")
+METRICS.print_report()
@@ -1,6 +1,7 @@
 
 from utils.Database import Database
 from utils.PlanetPositions import PlanetPositions
+from utils.Metrics import METRICS, stage_timer
 import pandas as pd
 import numpy as np
 import datetime
@@ -60,9 +61,12 @@ def process_dataframe(df: pd.DataFrame, convert_time: bool = False) -> pd.DataFr
 
 print("\nGetting data from PlanetPositions...\n")
 pp = PlanetPositions(start_date=START_DATE, stop_date=END_DATE, step='1h')
-pp.fetch_data()
-pp.convert_time()
-df_planet = pp.get_dataframe()
+with stage_timer("horizons_fetch", verbose=True):
+    pp.fetch_data()
+with stage_timer("horizons_convert_time", verbose=True) as timer:
+    pp.convert_time()
+    df_planet = pp.get_dataframe()
+    timer.rows = len(df_planet)
 
 
 
@@ -85,17 +89,21 @@ db = Database(
     )
     
 
-db_data_all = db.get_all_data(key="time")
+with stage_timer("db_read", verbose=True) as timer:
+    db_data_all = db.get_all_data(key="time")
+    timer.rows = len(db_data_all)
 db.close_connection()
 
 if db_data_all:
-    df_db = pd.DataFrame(db_data_all).drop(columns=["_id"])[["time", "planet"]]
-    df_db = process_dataframe(df_db, convert_time=True)
-    len_before = len(df_planet)
-    # Use a performant merge operation instead of looping
-    df_planet = df_planet.merge(df_db, on=["time", "planet"], how="left", indicator=True)
-    df_planet = df_planet[df_planet["_merge"] == "left_only"].drop(columns=["_merge"])
-    len_after = len(df_planet)
+    with stage_timer("dedup_merge", verbose=True) as timer:
+        df_db = pd.DataFrame(db_data_all).drop(columns=["_id"])[["time", "planet"]]
+        df_db = process_dataframe(df_db, convert_time=True)
+        len_before = len(df_planet)
+        # Use a performant merge operation instead of looping
+        df_planet = df_planet.merge(df_db, on=["time", "planet"], how="left", indicator=True)
+        df_planet = df_planet[df_planet["_merge"] == "left_only"].drop(columns=["_merge"])
+        len_after = len(df_planet)
+        timer.rows = len_before
     print(f"\nRemoved {len_before - len_after} existing records from the Copernicus data")
     print(f"Reduced data: {len(df_planet)} rows\n")
 
@@ -111,7 +119,8 @@ db = Database(
 df_planet = process_dataframe(df_planet, convert_time=True)
 #print(df_planet[['datetime_utc', 'time']].head())
 if not df_planet.empty:
-    db.upload_many(df_planet.to_dict(orient="records"))
+    with stage_timer("upload_many", rows=len(df_planet), verbose=True):
+        db.upload_many(df_planet.to_dict(orient="records"))
     print(f"Uploaded {len(df_planet)} records to the database")
 else:
     print("No data to upload to database")
@@ -119,6 +128,9 @@ else:
 db.close_connection()
 
 
+print("\nStage metrics:")
+METRICS.print_report()
+
 print("Finished!\n")
 
 
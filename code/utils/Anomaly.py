@@ -0,0 +1,315 @@
+import math
+import requests
+import pandas as pd
+import numpy as np
+
+
+# Sturmflut-Klassen der Ostsee wie in Anomalie.ipynb (Wasserstand über Mittelwasser in m)
+SURGE_LEVELS = [
+    (2.0, "sehr schwere Sturmflut"),
+    (1.5, "schwere Sturmflut"),
+    (1.25, "mittlere Sturmflut"),
+    (1.0, "Sturmflut"),
+]
+
+
+def surge_level(value):
+    for threshold, name in SURGE_LEVELS:
+        if value >= threshold:
+            return name
+    return None
+
+
+class StationState():
+    """O(1) rolling state of one station: EWMA mean/variance of the level and of the model residual."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.residual_count = 0
+        self.residual_mean = 0.0
+        self.residual_var = 0.0
+        self.last_time = None
+        self.in_event = False
+        self.event_start = None
+        self.event_peak = -math.inf
+        self.event_peak_time = None
+        self.event_reasons = set()
+
+    @staticmethod
+    def _ewm_update(mean, var, value, alpha):
+        delta = value - mean
+        mean = mean + alpha * delta
+        var = (1 - alpha) * (var + alpha * delta ** 2)
+        return mean, var
+
+
+class SurgeDetector():
+    """Streaming storm-surge detector for tide-gauge and model observations.
+
+    Every sample is checked against
+        - a fixed threshold (default 1.0 m as in Anomalie.ipynb),
+        - a rolling z-score from an exponentially weighted mean/variance,
+        - optionally the residual to the model `sla`, corrected by its EWMA bias,
+    using only the O(1) state kept per station. An event is emitted when a
+    station enters a surge, when the surge class escalates and when it ends.
+    Events are passed to every sink (e.g. DatabaseSink, HttpSink).
+    """
+
+    def __init__(self, threshold=1.0, z_threshold=3.0, window=24 * 30, min_periods=48,
+                 residual_threshold=None, residual_window=24 * 7, sinks=None):
+        self.threshold = threshold
+        self.z_threshold = z_threshold
+        self.alpha = 2 / (window + 1)
+        self.min_periods = min_periods
+        self.residual_threshold = residual_threshold
+        self.residual_alpha = 2 / (residual_window + 1)
+        self.sinks = list(sinks) if sinks else []
+        self.states = {}
+
+    def _emit(self, event):
+        for sink in self.sinks:
+            sink(event)
+        return event
+
+    def update(self, station, time, value, model_sla=None):
+        """Processes one sample and returns the list of emitted events."""
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return []
+        time = pd.Timestamp(time)
+        value = float(value)
+        state = self.states.setdefault(station, StationState())
+
+        # Out-of-order or duplicate samples (e.g. overlapping pages) are ignored
+        if state.last_time is not None and time <= state.last_time:
+            return []
+        state.last_time = time
+
+        reasons = set()
+        z_score = None
+        if state.count >= self.min_periods and state.var > 0:
+            z_score = (value - state.mean) / math.sqrt(state.var)
+            if z_score > self.z_threshold:
+                reasons.add("z_score")
+        if self.threshold is not None and value > self.threshold:
+            reasons.add("threshold")
+
+        residual = None
+        if model_sla is not None and not (isinstance(model_sla, float) and math.isnan(model_sla)):
+            residual = value - float(model_sla)
+            if self.residual_threshold is not None and state.residual_count >= self.min_periods:
+                if residual - state.residual_mean > self.residual_threshold:
+                    reasons.add("residual")
+            # Only quiet samples update the residual bias so a surge does not shift its own baseline
+            if not reasons:
+                state.residual_mean, state.residual_var = StationState._ewm_update(
+                    state.residual_mean, state.residual_var, residual, self.residual_alpha)
+                state.residual_count += 1
+
+        if state.count == 0:
+            state.mean = value
+        state.mean, state.var = StationState._ewm_update(state.mean, state.var, value, self.alpha)
+        state.count += 1
+
+        events = []
+        if reasons:
+            level = surge_level(value)
+            if not state.in_event:
+                state.in_event = True
+                state.event_start = time
+                state.event_peak = value
+                state.event_peak_time = time
+                state.event_reasons = set(reasons)
+                events.append(self._event("start", station, time, value, level, reasons, z_score, residual))
+            else:
+                escalated = level is not None and surge_level(state.event_peak) != level and value > state.event_peak
+                if value > state.event_peak:
+                    state.event_peak = value
+                    state.event_peak_time = time
+                state.event_reasons |= reasons
+                if escalated:
+                    events.append(self._event("escalation", station, time, value, level, reasons, z_score, residual))
+        elif state.in_event:
+            event = self._event("end", station, time, value, surge_level(state.event_peak),
+                                state.event_reasons, z_score, residual)
+            event.update({
+                "start": state.event_start.to_pydatetime(),
+                "peak": state.event_peak,
+                "peak_time": state.event_peak_time.to_pydatetime(),
+            })
+            events.append(event)
+            state.in_event = False
+
+        return [self._emit(event) for event in events]
+
+    def _event(self, kind, station, time, value, level, reasons, z_score, residual):
+        return {
+            "type": kind,
+            "station": station,
+            "time": time.to_pydatetime(),
+            "value": value,
+            "level": level,
+            "reasons": sorted(reasons),
+            "z_score": z_score,
+            "residual": residual,
+        }
+
+    def update_batch(self, df: pd.DataFrame, station_col="station", time_col="time", value_col="value", model_col=None):
+        """Processes a batch in time order; per sample cost stays O(1)."""
+        events = []
+        df = df.sort_values(time_col)
+        stations = df[station_col].to_numpy()
+        times = df[time_col].to_numpy()
+        values = df[value_col].to_numpy(dtype=np.float64)
+        models = df[model_col].to_numpy(dtype=np.float64) if model_col else [None] * len(df)
+        for station, time, value, model in zip(stations, times, values, models):
+            events.extend(self.update(station, time, value, model))
+        return events
+
+
+# ------------ Sinks ------------
+class DatabaseSink():
+    """Writes events into a utils.Database collection."""
+
+    def __init__(self, db):
+        self.db = db
+
+    def __call__(self, event):
+        self.db.upload_one(dict(event))
+
+
+class HttpSink():
+    """POSTs events as JSON to an endpoint."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def __call__(self, event):
+        payload = {k: (v.isoformat() if hasattr(v, "isoformat") else v) for k, v in event.items()}
+        try:
+            self.session.post(self.url, json=payload, timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"Error: could not send event to {self.url}: {e}")
+
+
+# ------------ Sources ------------
+def frost_batches(server, since=None, limit_per_page=1000):
+    """Yields FROST observation pages as DataFrames (station, time, value)."""
+    params = {"$top": limit_per_page, "$orderby": "phenomenonTime asc"}
+    if since is not None:
+        params["$filter"] = f"phenomenonTime gt {pd.Timestamp(since).strftime('%Y-%m-%dT%H:%M:%SZ')}"
+    station = server.get_thing_name()
+    for page in server.iter_observation_pages(params=params):
+        if not page:
+            continue
+        df = pd.DataFrame(page)
+        yield pd.DataFrame({
+            "station": station,
+            "time": pd.to_datetime(df["phenomenonTime"].str.split("/").str[0], utc=True).dt.tz_localize(None),
+            "value": pd.to_numeric(df["result"], errors="coerce"),
+        })
+
+
+def insitu_batches(path, since=None, batch_size=10_000, variable="SLEV"):
+    """Yields quality-controlled samples of an in-situ tide-gauge NetCDF file in batches."""
+    import xarray as xr
+
+    with xr.open_dataset(path) as ds:
+        station = ds.attrs.get("platform_code", path)
+        times = pd.DatetimeIndex(ds["TIME"].values)
+        start = 0 if since is None else int(times.searchsorted(pd.Timestamp(since), side="right"))
+        for i in range(start, len(times), batch_size):
+            chunk = ds.isel(TIME=slice(i, i + batch_size))
+            values = chunk[variable].values.reshape(len(chunk["TIME"]), -1)[:, 0]
+            qc = chunk[f"{variable}_QC"].values.reshape(len(chunk["TIME"]), -1)[:, 0]
+            df = pd.DataFrame({"station": station, "time": chunk["TIME"].values, "value": values})
+            yield df[qc == 1]
+
+
+def _model_sla(db, bbox, t0, t1, value_col="sla"):
+    """Mean model value inside bbox per time step for t0 <= time < t1."""
+    query = {
+        "latitude": {"$gte": bbox["min_lat"], "$lte": bbox["max_lat"]},
+        "longitude": {"$gte": bbox["min_lon"], "$lte": bbox["max_lon"]},
+        "time": {"$gte": pd.Timestamp(t0).to_pydatetime(), "$lt": pd.Timestamp(t1).to_pydatetime()},
+    }
+    pipeline = [
+        {"$match": query},
+        {"$group": {"_id": "$time", "value": {"$avg": f"${value_col}"}}},
+        {"$sort": {"_id": 1}},
+    ]
+    df = pd.DataFrame(list(db.collection.aggregate(pipeline)))
+    if df.empty:
+        return pd.DataFrame({"time": pd.Series(dtype="datetime64[ns]"), "value": pd.Series(dtype=np.float64)})
+    return pd.DataFrame({"time": pd.to_datetime(df["_id"]), "value": df["value"].astype(np.float64)})
+
+
+def ocean_weather_batches(db, bbox, since=None, until=None, chunk_hours=24 * 7, value_col="sla"):
+    """Yields the mean model sla inside bbox per time step from the ocean-weather collection, one time chunk at a time."""
+    # BSON datetimes keep milliseconds, so open bounds must step by at least 1 ms
+    resolution = pd.Timedelta(1, unit="ms")
+    if since is None:
+        first = db.collection.find_one({}, {"time": 1}, sort=[("time", 1)])
+        if first is None:
+            return
+        t0 = pd.Timestamp(first["time"])
+    else:
+        # since is exclusive, like the other sources
+        since = pd.Timestamp(since)
+        if since.tzinfo is not None:
+            # Mongo returns naive UTC datetimes
+            since = since.tz_convert("UTC").tz_localize(None)
+        t0 = since + resolution
+    if until is None:
+        last = db.collection.find_one({}, {"time": 1}, sort=[("time", -1)])
+        if last is None:
+            return
+        # until is exclusive, step past the newest sample so it is included
+        until = pd.Timestamp(last["time"]) + resolution
+    until = pd.Timestamp(until)
+
+    step = pd.Timedelta(hours=chunk_hours)
+    while t0 < until:
+        t1 = min(t0 + step, until)
+        df = _model_sla(db, bbox, t0, t1, value_col=value_col)
+        if since is not None:
+            df = df[df["time"] > since]
+        if not df.empty:
+            yield pd.DataFrame({"station": db.collection_name, "time": df["time"], "value": df["value"]})
+        t0 = t1
+
+
+def with_model_sla(batches, db, bbox, tolerance="30min", value_col="sla", model_col="model_sla"):
+    """Adds the model sla (mean inside bbox) nearest in time to every gauge sample.
+
+    Feed the result through SurgeDetector.update_batch(batch, model_col="model_sla")
+    to enable the residual check.
+    """
+    tolerance = pd.Timedelta(tolerance)
+    for batch in batches:
+        if batch.empty:
+            continue
+        batch = batch.sort_values("time")
+        batch["time"] = pd.to_datetime(batch["time"]).astype("datetime64[ns]")
+        model = _model_sla(db, bbox, batch["time"].min() - tolerance, batch["time"].max() + tolerance,
+                           value_col=value_col)
+        model = model.rename(columns={"value": model_col})
+        model["time"] = model["time"].astype("datetime64[ns]")
+        yield pd.merge_asof(batch, model, on="time", direction="nearest", tolerance=tolerance)
+
+
+if __name__ == '__main__':
+    from utils.frost_server import FrostServer
+
+    detector = SurgeDetector(threshold=1.0, sinks=[print])
+
+    server = FrostServer(thing='Things(3)')
+    for batch in frost_batches(server, since=pd.Timestamp.now() - pd.Timedelta(days=7)):
+        detector.update_batch(batch)
+
+    # Gauge samples against the model, e.g. Kiel Holtenau in data/ with the ocean-weather collection:
+    # for batch in with_model_sla(insitu_batches("data/NO_TS_TG_KielHoltenauTG.nc"), db, bbox):
+    #     detector.update_batch(batch, model_col="model_sla")
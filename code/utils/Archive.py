@@ -0,0 +1,181 @@
+import os
+import uuid
+import math
+import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+
+class Archive():
+    """Hive-partitioned Parquet archive with the same write/read interface as utils.Database.
+
+    Files are laid out as <root>/source=<source>/date=<YYYY-MM-DD>/tile=<tile>/part-*.parquet
+    so that reads filtered by time range and bbox only open the matching partitions.
+    """
+
+    def __init__(self, root, source, tile_size=1.0, time_key="time"):
+        self.root = root
+        self.source = source
+        self.tile_size = tile_size
+        self.time_key = time_key
+        self.partitioning = ds.partitioning(
+            pa.schema([("source", pa.string()), ("date", pa.string()), ("tile", pa.string())]),
+            flavor="hive",
+        )
+        os.makedirs(self.root, exist_ok=True)
+
+    # ------------ Partition Helpers ------------
+    @staticmethod
+    def _to_ns(value):
+        """Naive (UTC) nanosecond Timestamp; string inputs are s/us depending on the pandas version."""
+        ts = pd.Timestamp(value)
+        if ts.tzinfo is not None:
+            ts = ts.tz_convert("UTC").tz_localize(None)
+        return ts.as_unit("ns")
+
+    def _tile_index(self, value):
+        return int(math.floor(value / self.tile_size))
+
+    def _tile_name(self, lat_idx, lon_idx):
+        return f"{lat_idx}_{lon_idx}"
+
+    def tiles_for_bbox(self, bbox):
+        """Returns all tile names overlapping a bbox dict with min_lat/max_lat/min_lon/max_lon."""
+        lat_range = range(self._tile_index(bbox["min_lat"]), self._tile_index(bbox["max_lat"]) + 1)
+        lon_range = range(self._tile_index(bbox["min_lon"]), self._tile_index(bbox["max_lon"]) + 1)
+        return [self._tile_name(lat, lon) for lat in lat_range for lon in lon_range]
+
+    def _prepare(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Converts value columns to float32 and adds the partition columns."""
+        df = df.copy()
+        # Coordinates stay float64 so bbox filters with float64 bounds keep the edge cells
+        float_cols = df.select_dtypes(include=["float"]).columns.difference(["latitude", "longitude"])
+        df[float_cols] = df[float_cols].astype(np.float32)
+
+        df[self.time_key] = pd.to_datetime(df[self.time_key])
+        if df[self.time_key].dt.tz is not None:
+            df[self.time_key] = df[self.time_key].dt.tz_convert("UTC").dt.tz_localize(None)
+        # pandas 3 defaults to us, keep the archive schema stable
+        df[self.time_key] = df[self.time_key].astype("datetime64[ns]")
+
+        df["source"] = self.source
+        df["date"] = df[self.time_key].dt.strftime("%Y-%m-%d")
+        if "latitude" in df.columns and "longitude" in df.columns:
+            lat_idx = np.floor(df["latitude"].to_numpy(dtype=np.float64) / self.tile_size).astype(np.int64)
+            lon_idx = np.floor(df["longitude"].to_numpy(dtype=np.float64) / self.tile_size).astype(np.int64)
+            df["tile"] = pd.Series(lat_idx, index=df.index).astype(str) + "_" + pd.Series(lon_idx, index=df.index).astype(str)
+        else:
+            df["tile"] = "all"
+        return df
+
+    # ------------ Write ------------
+    def upload_one(self, data, verbose=False):
+        self.upload_many([data], verbose=verbose)
+
+    def upload_many(self, data: list, verbose=False):
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        df = df.drop(columns=["_id"], errors="ignore")
+        if df.empty:
+            return
+        table = pa.Table.from_pandas(self._prepare(df), preserve_index=False)
+        # Unique basename per call so repeated uploads append new files instead of overwriting
+        ds.write_dataset(
+            table,
+            self.root,
+            format="parquet",
+            partitioning=self.partitioning,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+        if verbose:
+            print(f"Archived {len(df)} records to {self.root}")
+
+    # ------------ Read ------------
+    def _dataset(self):
+        return ds.dataset(self.root, format="parquet", partitioning=self.partitioning)
+
+    def read(self, start=None, end=None, bbox=None, columns=None) -> pd.DataFrame:
+        """Reads a time range / bbox / column subset with partition and row-group pushdown.
+
+        start and end are inclusive and may be anything pd.Timestamp accepts,
+        bbox is a dict with min_lat, max_lat, min_lon and max_lon.
+        """
+        expr = ds.field("source") == self.source
+
+        if start is not None:
+            start = self._to_ns(start)
+            expr &= ds.field("date") >= start.strftime("%Y-%m-%d")
+            expr &= ds.field(self.time_key) >= pa.scalar(start.to_datetime64(), type=pa.timestamp("ns"))
+        if end is not None:
+            end = self._to_ns(end)
+            expr &= ds.field("date") <= end.strftime("%Y-%m-%d")
+            expr &= ds.field(self.time_key) <= pa.scalar(end.to_datetime64(), type=pa.timestamp("ns"))
+        if bbox is not None:
+            expr &= ds.field("tile").isin(self.tiles_for_bbox(bbox))
+            expr &= (ds.field("latitude") >= bbox["min_lat"]) & (ds.field("latitude") <= bbox["max_lat"])
+            expr &= (ds.field("longitude") >= bbox["min_lon"]) & (ds.field("longitude") <= bbox["max_lon"])
+
+        if columns is not None:
+            columns = list(dict.fromkeys([self.time_key] + list(columns)))
+
+        if not os.listdir(self.root):
+            return pd.DataFrame(columns=columns)
+
+        table = self._dataset().to_table(columns=columns, filter=expr)
+        df = table.to_pandas()
+        return df.drop(columns=["source", "date", "tile"], errors="ignore")
+
+    def get_latest_data(self, key, limit=1000):
+        return self.get_all_data(key)[:limit]
+
+    def get_all_data(self, key):
+        df = self.read()
+        if df.empty:
+            return []
+        return df.sort_values(key, ascending=False).to_dict(orient="records")
+
+    def close_connection(self):
+        # Nothing to close, kept for interface compatibility with utils.Database
+        pass
+
+
+def export_collection(db, archive, key="time", batch_size=100_000, verbose=False):
+    """Copies all documents of a utils.Database collection into an Archive in batches."""
+    cursor = db.collection.find({}, {"_id": 0}).sort(key, 1).batch_size(batch_size)
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            archive.upload_many(batch, verbose=verbose)
+            batch = []
+    archive.upload_many(batch, verbose=verbose)
+
+
+if __name__ == '__main__':
+
+    archive = Archive(root='data/archive', source='test')
+
+    df = pd.DataFrame({
+        "time": pd.date_range("2025-01-01", periods=48, freq="h").repeat(4),
+        "latitude": np.tile([54.1, 54.1, 55.2, 55.2], 48),
+        "longitude": np.tile([10.1, 11.3, 10.1, 11.3], 48),
+        "sla": np.random.randn(48 * 4),
+    })
+    archive.upload_many(df.to_dict(orient="records"), verbose=True)
+
+    print(archive.read(
+        start="2025-01-02",
+        end="2025-01-02 12:00",
+        bbox={"min_lat": 54.0, "max_lat": 54.5, "min_lon": 10.0, "max_lon": 11.5},
+        columns=["latitude", "longitude", "sla"],
+    ))
+
+    # A bbox whose edges sit exactly on grid cells must return those cells
+    df_edge = archive.read(
+        start="2025-01-01",
+        end="2025-01-01",
+        bbox={"min_lat": 54.1, "max_lat": 55.2, "min_lon": 10.1, "max_lon": 10.1},
+        columns=["latitude", "longitude", "sla"],
+    )
+    assert set(zip(df_edge["latitude"], df_edge["longitude"])) >= {(54.1, 10.1), (55.2, 10.1)}, df_edge
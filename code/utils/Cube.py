@@ -0,0 +1,206 @@
+import os
+import json
+import pandas as pd
+import numpy as np
+from tqdm import tqdm
+
+
+FEATURES_FILE = "features.npy"
+TARGET_FILE = "target.npy"
+TIME_FILE = "time.npy"
+META_FILE = "meta.json"
+
+
+class CubeBuilder():
+    """Builds the dense (T, lat, lon, features) training cube from long-format rows.
+
+    Rows (time, latitude, longitude, <features>) are scattered into a float32
+    .npy memmap on a fixed hourly time index and lat/lon grid, chunk by chunk,
+    so the full cube never has to fit in memory. Cells without data stay NaN.
+    The target is the mean of `target` over `target_bbox` for every time step.
+    """
+
+    def __init__(self, features: list, target="sla", target_bbox=None, coordinate_rounding=3, freq="h"):
+        self.features = list(features)
+        self.target = target
+        self.target_bbox = target_bbox
+        self.coordinate_rounding = coordinate_rounding
+        self.freq = freq
+
+    # ------------ Grid ------------
+    def make_time_index(self, start, end):
+        return pd.date_range(pd.Timestamp(start).floor(self.freq), pd.Timestamp(end).floor(self.freq), freq=self.freq)
+
+    def make_grid(self, values):
+        return np.unique(np.round(np.asarray(values, dtype=np.float64), self.coordinate_rounding))
+
+    def _grid_indices(self, df, time_values, latitudes, longitudes):
+        """Maps the rows of df to (time, lat, lon) cube indices; valid marks rows that hit the grid exactly."""
+        t = pd.to_datetime(df["time"])
+        if t.dt.tz is not None:
+            t = t.dt.tz_localize(None)
+        t = t.dt.round(self.freq).values
+        lat = np.round(df["latitude"].to_numpy(dtype=np.float64), self.coordinate_rounding)
+        lon = np.round(df["longitude"].to_numpy(dtype=np.float64), self.coordinate_rounding)
+
+        t_idx = np.searchsorted(time_values, t)
+        lat_idx = np.searchsorted(latitudes, lat)
+        lon_idx = np.searchsorted(longitudes, lon)
+
+        valid = (t_idx < len(time_values)) & (lat_idx < len(latitudes)) & (lon_idx < len(longitudes))
+        valid[valid] &= (time_values[t_idx[valid]] == t[valid])
+        valid[valid] &= np.isclose(latitudes[lat_idx[valid]], lat[valid])
+        valid[valid] &= np.isclose(longitudes[lon_idx[valid]], lon[valid])
+        return valid, t_idx, lat_idx, lon_idx, lat, lon
+
+    def to_array(self, df, times, latitudes, longitudes):
+        """Scatters one in-memory DataFrame into a dense (T, lat, lon, features) float32 array."""
+        time_values = pd.DatetimeIndex(times).values
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        array = np.full((len(time_values), len(latitudes), len(longitudes), len(self.features)), np.nan, dtype=np.float32)
+        if df.empty:
+            return array
+        valid, t_idx, lat_idx, lon_idx, _, _ = self._grid_indices(df, time_values, latitudes, longitudes)
+        values = df.reindex(columns=self.features).to_numpy(dtype=np.float32)[valid]
+        array[t_idx[valid], lat_idx[valid], lon_idx[valid]] = values
+        return array
+
+    # ------------ Build ------------
+    def build(self, frames, times, latitudes, longitudes, path, verbose=False):
+        """Scatters an iterable of DataFrames into a cube stored at path (a directory)."""
+        times = pd.DatetimeIndex(times)
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        os.makedirs(path, exist_ok=True)
+
+        shape = (len(times), len(latitudes), len(longitudes), len(self.features))
+        cube = np.lib.format.open_memmap(os.path.join(path, FEATURES_FILE), mode="w+", dtype=np.float32, shape=shape)
+        cube[:] = np.nan
+
+        target_sum = np.zeros(len(times), dtype=np.float64)
+        target_count = np.zeros(len(times), dtype=np.int64)
+
+        time_values = times.values
+        for df in tqdm(frames, desc="Building cube", disable=not verbose):
+            if df is None or df.empty:
+                continue
+            valid, t_idx, lat_idx, lon_idx, lat, lon = self._grid_indices(df, time_values, latitudes, longitudes)
+            if not valid.any():
+                continue
+
+            values = df.reindex(columns=self.features).to_numpy(dtype=np.float32)[valid]
+            cube[t_idx[valid], lat_idx[valid], lon_idx[valid]] = values
+
+            if self.target in df.columns:
+                in_target = valid.copy()
+                if self.target_bbox is not None:
+                    in_target &= (lat >= self.target_bbox["min_lat"]) & (lat <= self.target_bbox["max_lat"])
+                    in_target &= (lon >= self.target_bbox["min_lon"]) & (lon <= self.target_bbox["max_lon"])
+                target_values = df[self.target].to_numpy(dtype=np.float64)
+                in_target &= ~np.isnan(target_values)
+                target_sum += np.bincount(t_idx[in_target], weights=target_values[in_target], minlength=len(times))
+                target_count += np.bincount(t_idx[in_target], minlength=len(times))
+
+        cube.flush()
+        del cube
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            target = (target_sum / target_count).astype(np.float32)
+        np.save(os.path.join(path, TARGET_FILE), target)
+        np.save(os.path.join(path, TIME_FILE), time_values.astype("datetime64[ns]"))
+
+        meta = {
+            "features": self.features,
+            "target": self.target,
+            "target_bbox": self.target_bbox,
+            "latitude": latitudes.tolist(),
+            "longitude": longitudes.tolist(),
+            "freq": self.freq,
+        }
+        with open(os.path.join(path, META_FILE), "w") as f:
+            json.dump(meta, f, indent=4)
+
+        if verbose:
+            print(f"Cube {shape} written to {path}")
+        return path
+
+    def build_from_database(self, db, start, end, path, chunk_hours=24 * 7, verbose=False):
+        """Builds the cube from a utils.Database collection, reading one time chunk at a time."""
+        times = self.make_time_index(start, end)
+        latitudes = self.make_grid(db.collection.distinct("latitude"))
+        longitudes = self.make_grid(db.collection.distinct("longitude"))
+        projection = {"_id": 0, "time": 1, "latitude": 1, "longitude": 1}
+        projection.update({col: 1 for col in set(self.features + [self.target])})
+        step = pd.tseries.frequencies.to_offset(self.freq)
+
+        def frames():
+            for i in range(0, len(times), chunk_hours):
+                # Half-open [t0, t1) with t1 one step after the chunk's last hour
+                t0 = times[i].to_pydatetime()
+                t1 = (times[min(i + chunk_hours, len(times)) - 1] + step).to_pydatetime()
+                cursor = db.collection.find({"time": {"$gte": t0, "$lt": t1}}, projection)
+                yield pd.DataFrame(list(cursor))
+
+        return self.build(frames(), times, latitudes, longitudes, path, verbose=verbose)
+
+    def build_from_archive(self, archive, start, end, path, bbox=None, chunk_hours=24 * 7, verbose=False):
+        """Builds the cube from a utils.Archive, reading one time chunk at a time."""
+        times = self.make_time_index(start, end)
+        step = pd.tseries.frequencies.to_offset(self.freq)
+        columns = ["latitude", "longitude"] + list(dict.fromkeys(self.features + [self.target]))
+
+        def chunks():
+            for i in range(0, len(times), chunk_hours):
+                t0 = times[i]
+                t1 = times[min(i + chunk_hours, len(times)) - 1] + step - pd.Timedelta(1, unit="ns")
+                yield t0, t1
+
+        # Distinct coordinates chunk by chunk, so memory stays O(cells) instead of O(T x cells)
+        latitudes, longitudes = np.empty(0), np.empty(0)
+        for t0, t1 in chunks():
+            grid = archive.read(start=t0, end=t1, bbox=bbox, columns=["latitude", "longitude"])
+            latitudes = np.union1d(latitudes, self.make_grid(grid["latitude"]))
+            longitudes = np.union1d(longitudes, self.make_grid(grid["longitude"]))
+
+        def frames():
+            for t0, t1 in chunks():
+                yield archive.read(start=t0, end=t1, bbox=bbox, columns=columns)
+
+        return self.build(frames(), times, latitudes, longitudes, path, verbose=verbose)
+
+
+def open_cube(path, mmap_mode="r"):
+    """Opens a cube written by CubeBuilder in O(1); features are returned as a memmap."""
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    return {
+        "features": np.load(os.path.join(path, FEATURES_FILE), mmap_mode=mmap_mode),
+        "target": np.load(os.path.join(path, TARGET_FILE), mmap_mode=mmap_mode),
+        "time": pd.DatetimeIndex(np.load(os.path.join(path, TIME_FILE))),
+        "latitude": np.asarray(meta["latitude"]),
+        "longitude": np.asarray(meta["longitude"]),
+        "feature_names": meta["features"],
+        "meta": meta,
+    }
+
+
+if __name__ == '__main__':
+
+    times = pd.date_range("2025-01-01", periods=72, freq="h")
+    lats = np.round(np.arange(54.0, 54.5, 0.1), 3)
+    lons = np.round(np.arange(10.0, 10.4, 0.1), 3)
+    t, la, lo = np.meshgrid(times, lats, lons, indexing="ij")
+    df = pd.DataFrame({
+        "time": t.ravel(),
+        "latitude": la.ravel(),
+        "longitude": lo.ravel(),
+        "sla": np.random.randn(t.size),
+        "thetao": np.random.randn(t.size),
+    })
+
+    builder = CubeBuilder(features=["sla", "thetao"], target_bbox={"min_lat": 54.2, "max_lat": 54.3, "min_lon": 10.1, "max_lon": 10.2})
+    builder.build([df.iloc[:500], df.iloc[500:]], times, lats, lons, "data/cube-test", verbose=True)
+
+    cube = open_cube("data/cube-test")
+    print(cube["features"].shape, cube["target"].shape, cube["time"][:3])
@@ -0,0 +1,220 @@
+import os
+import time
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+import pandas as pd
+import numpy as np
+import torch
+
+from utils.Cube import CubeBuilder, open_cube
+from utils.Statistics import STATS_FILE, load_stats
+from utils.models import load_model
+from utils.Metrics import stage_timer
+
+
+class ForecastService():
+    """Serves OceanWaterLevelPredictor forecasts on CPU.
+
+    The model is loaded once, requests are collected by a single inference
+    thread and run as one micro-batched forward pass, and results are cached
+    per input window until set_data() is called with new data. Concurrent
+    requests for the same window share one pending result.
+    """
+
+    def __init__(self, model_path, cube_path, input_size=48, num_threads=None,
+                 max_batch_size=16, max_wait_ms=10, coordinate_rounding=3, cache_size=256):
+        self.input_size = input_size
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache_size = cache_size
+
+        # Grid, features and scaling must match the cube the model was trained on
+        cube = open_cube(cube_path)
+        self.latitudes = cube["latitude"]
+        self.longitudes = cube["longitude"]
+        self.target = cube["meta"]["target"]
+        self.freq = cube["meta"]["freq"]
+        self.builder = CubeBuilder(features=cube["feature_names"], target=self.target,
+                                   coordinate_rounding=coordinate_rounding, freq=self.freq)
+        if os.path.exists(os.path.join(cube_path, STATS_FILE)):
+            self.feature_stats, self.target_stats = load_stats(cube_path)
+            # Same scaling method as the training dataset, as recorded in stats.json
+            self.normalize = self.feature_stats.method
+        else:
+            self.feature_stats, self.target_stats = None, None
+            self.normalize = None
+
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.model = load_model(model_path)
+
+        self.df = None
+        self.times = None
+        self.data_version = 0
+        self.cache = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+
+        self.queue = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="forecast")
+        self.executor.submit(self._batch_loop)
+
+    # ------------ Data ------------
+    def set_data(self, df: pd.DataFrame):
+        """Replaces the in-memory data and invalidates all cached forecasts."""
+        df = df.sort_values("time").reset_index(drop=True)
+        with self.lock:
+            self.df = df
+            self.times = df["time"].values
+            self.data_version += 1
+            self.cache.clear()
+
+    def latest_time(self):
+        return pd.Timestamp(self.times[-1]).floor(self.freq)
+
+    def build_window(self, end, df=None, times=None):
+        """Returns the normalised (input_size, lat, lon, features) window ending at end."""
+        df = self.df if df is None else df
+        times = self.times if times is None else times
+        window_times = pd.date_range(end=end, periods=self.input_size, freq=self.freq)
+        lo = np.searchsorted(times, window_times[0].to_datetime64(), side="left")
+        hi = np.searchsorted(times, window_times[-1].to_datetime64(), side="right")
+        if lo == hi:
+            raise ValueError(f"No data between {window_times[0]} and {window_times[-1]}")
+        X = self.builder.to_array(df.iloc[lo:hi], window_times, self.latitudes, self.longitudes)
+        if self.feature_stats is not None:
+            X = self.feature_stats.transform(X, self.normalize)
+        return np.nan_to_num(X, nan=0.0)
+
+    # ------------ Requests ------------
+    def forecast(self, end=None) -> Future:
+        """Returns a Future with the horizon forecast for the window ending at end (default: latest data).
+
+        The Future may be shared with other callers for the same window; do not cancel it.
+        """
+        with self.lock:
+            df, times, version = self.df, self.times, self.data_version
+        if df is None or df.empty:
+            raise ValueError("No data available. Call set_data() first.")
+        latest = pd.Timestamp(times[-1]).floor(self.freq)
+        if end is not None:
+            try:
+                end = pd.Timestamp(end)
+                if end.tzinfo is not None:
+                    # The data is naive UTC, so "Z" / "+01:00" inputs are converted first
+                    end = end.tz_convert("UTC").tz_localize(None)
+                end = end.floor(self.freq)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Invalid forecast time {end!r}: {e}") from e
+        else:
+            end = latest
+        if pd.isna(end):
+            raise ValueError("Invalid forecast time")
+        if end > latest:
+            raise ValueError(f"No data after {latest.isoformat()}, cannot forecast from {end.isoformat()}")
+        key = (version, end)
+
+        with self.lock:
+            if key in self.cache:
+                future = Future()
+                future.set_result(self.cache[key])
+                return future
+            if key in self.pending:
+                return self.pending[key]
+            future = Future()
+            self.pending[key] = future
+
+        try:
+            X = self.build_window(end, df, times)
+        except Exception as e:
+            with self.lock:
+                self.pending.pop(key, None)
+            self._resolve(future, exception=e)
+            return future
+        self.queue.put((key, X, future))
+        return future
+
+    async def forecast_async(self, end=None):
+        # Window building runs on the executor, not on the event loop
+        loop = asyncio.get_running_loop()
+        future = await loop.run_in_executor(None, self.forecast, end)
+        # Shield the shared Future so a cancelled caller does not cancel it for the others
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    # ------------ Inference ------------
+    @staticmethod
+    def _resolve(future, result=None, exception=None):
+        if future.done():
+            return
+        try:
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            # Cancelled or resolved concurrently
+            pass
+
+    def _next_batch(self):
+        first = self.queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self.queue.put(None)
+                break
+            batch.append(item)
+        return batch
+
+    def _batch_loop(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                # Never let one batch end the only inference thread
+                print(f"Error: forecast batch failed: {e}")
+                with self.lock:
+                    for key, _, _ in batch:
+                        self.pending.pop(key, None)
+                for _, _, future in batch:
+                    self._resolve(future, exception=e)
+
+    def _run_batch(self, batch):
+        keys, windows, futures = zip(*batch)
+        with stage_timer("forecast_inference", rows=len(windows)), torch.inference_mode():
+            y = self.model(torch.from_numpy(np.stack(windows))).numpy()
+        if self.target_stats is not None:
+            y = self.target_stats.inverse_transform(y.reshape(-1, 1), self.normalize).reshape(y.shape)
+
+        for key, prediction, future in zip(keys, y, futures):
+            _, end = key
+            result = {
+                "window_end": end.isoformat(),
+                "time": [t.isoformat() for t in pd.date_range(end, periods=len(prediction) + 1, freq=self.freq)[1:]],
+                self.target: prediction.astype(float).tolist(),
+            }
+            with self.lock:
+                self.pending.pop(key, None)
+                if key[0] == self.data_version:
+                    self.cache[key] = result
+                    while len(self.cache) > self.cache_size:
+                        self.cache.pop(next(iter(self.cache)))
+            self._resolve(future, result=result)
+
+    def close(self):
+        self.queue.put(None)
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,139 @@
+import os
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+from utils.Cube import open_cube
+
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def _to_xyz(latitudes, longitudes):
+    """Unit vectors on the sphere, so euclidean KD-tree distances follow great circles."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+class GridLookup():
+    """Nearest / k-nearest valid sea cells of a regular lat/lon model grid.
+
+    The KD-tree is built once per grid from the cells where `mask` is True
+    (e.g. cells where sla is not NaN), so any number of station or marina
+    coordinates can be mapped in one vectorised query instead of one remote
+    subset per station.
+    """
+
+    def __init__(self, latitudes, longitudes, mask=None):
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        if mask is None:
+            mask = np.ones((len(self.latitudes), len(self.longitudes)), dtype=bool)
+        self.lat_idx, self.lon_idx = np.nonzero(mask)
+        if len(self.lat_idx) == 0:
+            raise ValueError("Grid has no valid cells")
+        self.tree = cKDTree(_to_xyz(self.latitudes[self.lat_idx], self.longitudes[self.lon_idx]))
+
+    @classmethod
+    def from_cube(cls, path, feature="sla", time_steps=24):
+        """Valid cells are those with data for `feature` in the first time_steps of the cube."""
+        cube = open_cube(path)
+        f = cube["feature_names"].index(feature)
+        mask = ~np.isnan(cube["features"][:time_steps, :, :, f]).all(axis=0)
+        return cls(cube["latitude"], cube["longitude"], mask)
+
+    @classmethod
+    def from_dataset(cls, ds, variable="sla"):
+        """Builds the lookup from a Copernicus xarray Dataset (e.g. AdvancedCopernicus.get_subset)."""
+        data = ds[variable].isel(time=0).squeeze().values
+        return cls(ds["latitude"].values, ds["longitude"].values, ~np.isnan(data))
+
+    def query(self, latitudes, longitudes, k=1, max_distance_km=None):
+        """Maps coordinates to their k nearest valid cells.
+
+        Returns lat_idx, lon_idx, distance_km and inverse-distance weights,
+        each of shape (n, k). Neighbours beyond max_distance_km, or beyond the
+        number of valid cells, get weight 0 and index -1.
+        """
+        points = _to_xyz(np.atleast_1d(latitudes), np.atleast_1d(longitudes))
+        n_cells = len(self.lat_idx)
+        chord, idx = self.tree.query(points, k=min(k, n_cells))
+        chord = np.asarray(chord).reshape(len(points), -1)
+        idx = np.asarray(idx).reshape(len(points), -1)
+        if k > n_cells:
+            # Fewer valid cells than requested neighbours: pad like cKDTree does for missing neighbours
+            pad = k - n_cells
+            chord = np.hstack([chord, np.full((len(points), pad), np.inf)])
+            idx = np.hstack([idx, np.full((len(points), pad), n_cells)])
+
+        distance_km = 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+        valid = idx < n_cells
+        if max_distance_km is not None:
+            valid &= distance_km <= max_distance_km
+
+        # A station on a cell centre dominates, but neighbours still fill in where that cell is NaN
+        weights = 1 / np.maximum(distance_km, 1e-6)
+        weights = np.where(valid, weights, 0.0)
+        total = weights.sum(axis=1, keepdims=True)
+        weights = np.divide(weights, total, out=np.zeros_like(weights), where=total > 0)
+
+        idx = np.where(valid, idx, 0)
+        lat_idx = np.where(valid, self.lat_idx[idx], -1)
+        lon_idx = np.where(valid, self.lon_idx[idx], -1)
+        return lat_idx, lon_idx, distance_km, weights
+
+    def _weighted(self, values, weights):
+        """Weighted mean over the neighbour axis of (T, n, k) values, ignoring NaNs."""
+        w = np.broadcast_to(weights, values.shape)
+        w = np.where(np.isnan(values), 0.0, w)
+        total = w.sum(axis=-1)
+        with np.errstate(invalid="ignore"):
+            return np.where(total > 0, np.nansum(values * w, axis=-1) / total, np.nan)
+
+    def extract_cube(self, path, latitudes, longitudes, names=None, feature="sla", k=1, max_distance_km=None):
+        """Returns a (time x station) DataFrame of `feature` from one cube for all stations at once."""
+        cube = open_cube(path)
+        f = cube["feature_names"].index(feature)
+        lat_idx, lon_idx, _, weights = self.query(latitudes, longitudes, k=k, max_distance_km=max_distance_km)
+        values = np.asarray(cube["features"][:, np.maximum(lat_idx, 0), np.maximum(lon_idx, 0), f], dtype=np.float64)
+        series = self._weighted(values, weights)
+        return pd.DataFrame(series, index=cube["time"], columns=names)
+
+    def extract_dataset(self, ds, latitudes, longitudes, names=None, variable="sla", k=1, max_distance_km=None):
+        """Returns a (time x station) DataFrame of `variable` from one downloaded xarray Dataset."""
+        lat_idx, lon_idx, _, weights = self.query(latitudes, longitudes, k=k, max_distance_km=max_distance_km)
+        data = ds[variable].squeeze().transpose("time", "latitude", "longitude").values
+        values = data[:, np.maximum(lat_idx, 0), np.maximum(lon_idx, 0)].astype(np.float64)
+        series = self._weighted(values, weights)
+        return pd.DataFrame(series, index=pd.DatetimeIndex(ds["time"].values), columns=names)
+
+
+def station_coordinates(paths):
+    """Reads name, latitude and longitude of in-situ tide-gauge NetCDF files (e.g. data/*TG.nc)."""
+    import xarray as xr
+
+    rows = []
+    for path in paths:
+        with xr.open_dataset(path) as ds:
+            rows.append({
+                "station": ds.attrs.get("platform_code", os.path.basename(path)),
+                "latitude": float(np.nanmean(ds["LATITUDE"].values)),
+                "longitude": float(np.nanmean(ds["LONGITUDE"].values)),
+                "path": path,
+            })
+    return pd.DataFrame(rows)
+
+
+if __name__ == '__main__':
+
+    marinas = [os.path.join("data", f) for f in os.listdir("data") if f.endswith("TG.nc")]
+    stations = station_coordinates(marinas)
+
+    lookup = GridLookup.from_cube("data/cube-test")
+    lat_idx, lon_idx, distance_km, weights = lookup.query(stations["latitude"], stations["longitude"], k=4)
+    print(pd.DataFrame({"station": stations["station"], "distance_km": distance_km[:, 0]}))
+
+    df_model = lookup.extract_cube("data/cube-test", stations["latitude"], stations["longitude"],
+                                   names=stations["station"], k=4)
+    print(df_model.head())
@@ -0,0 +1,260 @@
+import os
+import io
+import json
+import time
+import threading
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+import pandas as pd
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from tqdm import tqdm
+
+
+PLATFORM_TYPES = {'BO/', 'CT/', 'DB/', 'FB/', 'GL/', 'HF/', 'ML/', 'MO/', 'PF/', 'RF/',
+                  'SD/', 'SM/', 'TG/', 'TS/', 'TX/', 'VA/', 'XB/', 'XX/'}
+
+INDEX_FILE = "index.json"
+MANIFEST_FILE = "manifest.json"
+
+
+class _LinkParser(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href)
+
+
+class InsituDownloader():
+    """Mirrors the Ifremer in-situ archive (e.g. glo_multiparameter_nrt/history/) into a local directory.
+
+    - directory listings are cached in <target_dir>/index.json for index_ttl seconds,
+    - files are fetched by a bounded thread pool sharing one pooled requests.Session,
+    - ETag/Last-Modified/size of every file are kept in <target_dir>/manifest.json and
+      sent as conditional headers, so unchanged files are skipped with a 304,
+    - downloads go to <file>.part and are resumed with a Range request, then
+      atomically renamed once complete.
+    The base_url can point at any HTTP server with the same layout, e.g. a local stand-in.
+    """
+
+    def __init__(self, target_dir, base_url="https://data-marineinsitu.ifremer.fr/glo_multiparameter_nrt/history/",
+                 index_url=None, max_workers=8, index_ttl=24 * 3600, timeout=60, chunk_size=1024 * 1024):
+        self.target_dir = target_dir
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        # Ifremer publishes per-file bounding boxes in index_history.txt next to the history/ directory
+        self.index_url = index_url if index_url is not None else urljoin(self.base_url, "../index_history.txt")
+        self.max_workers = max_workers
+        self.index_ttl = index_ttl
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+
+        os.makedirs(self.target_dir, exist_ok=True)
+        self.session = requests.Session()
+        retries = Retry(total=5, backoff_factor=1.0, status_forcelist=(429, 500, 502, 503, 504))
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.lock = threading.Lock()
+        self.index = self._load_json(INDEX_FILE)
+        self.manifest = self._load_json(MANIFEST_FILE)
+
+    # ------------ State Files ------------
+    def _load_json(self, name):
+        path = os.path.join(self.target_dir, name)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return {}
+
+    def _save_json(self, name, data):
+        path = os.path.join(self.target_dir, name)
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f, indent=4)
+        os.replace(path + ".tmp", path)
+
+    # ------------ Directory Index ------------
+    def list_directory(self, url, refresh=False):
+        """Returns the links of a directory listing, cached in index.json."""
+        entry = self.index.get(url)
+        if entry and not refresh and time.time() - entry["fetched"] < self.index_ttl:
+            return entry["links"]
+
+        headers = {"If-None-Match": entry["etag"]} if entry and entry.get("etag") else {}
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            entry["fetched"] = time.time()
+            return entry["links"]
+        response.raise_for_status()
+
+        parser = _LinkParser()
+        parser.feed(response.text)
+        links = [link for link in parser.links if not link.startswith(("?", "/", "..")) and "://" not in link]
+        self.index[url] = {"links": links, "etag": response.headers.get("ETag"), "fetched": time.time()}
+        return links
+
+    def list_files(self, platform_types=None, prefixes=None, bbox=None, refresh=False):
+        """Returns the relative paths (e.g. 'TG/NO_TS_TG_KielHoltenauTG.nc') matching the filters.
+
+        platform_types: e.g. ['TG/', 'MO/'] (default: all), prefixes: file name prefixes such as 'NO',
+        bbox: dict with min_lat/max_lat/min_lon/max_lon, matched against index_history.txt.
+        """
+        platform_types = PLATFORM_TYPES if platform_types is None else set(platform_types)
+        links = self.list_directory(self.base_url, refresh=refresh)
+        files = []
+        for platform in sorted(link for link in links if link in platform_types):
+            for link in self.list_directory(self.base_url + platform, refresh=refresh):
+                if not link.endswith(".nc"):
+                    continue
+                if prefixes and not link.startswith(tuple(prefixes)):
+                    continue
+                files.append(platform + link)
+        self._save_json(INDEX_FILE, self.index)
+
+        if bbox is not None:
+            inside = self.files_in_bbox(bbox, refresh=refresh)
+            files = [f for f in files if os.path.basename(f) in inside]
+        return files
+
+    def files_in_bbox(self, bbox, refresh=False):
+        """Returns the file names whose bounding box in index_history.txt intersects bbox."""
+        path = os.path.join(self.target_dir, "index_history.txt")
+        if refresh or not os.path.exists(path) or time.time() - os.path.getmtime(path) > self.index_ttl:
+            self.download(self.index_url, path)
+
+        with open(path) as f:
+            lines = [line for line in f if not line.startswith("#")]
+        df = pd.read_csv(io.StringIO("".join(lines)), header=None, usecols=range(6),
+                         names=["catalog_id", "file_name", "lat_min", "lat_max", "lon_min", "lon_max"])
+        inside = (
+            (df["lat_max"] >= bbox["min_lat"]) & (df["lat_min"] <= bbox["max_lat"])
+            & (df["lon_max"] >= bbox["min_lon"]) & (df["lon_min"] <= bbox["max_lon"])
+        )
+        return set(df.loc[inside, "file_name"].map(lambda url: os.path.basename(urlparse(str(url)).path)))
+
+    # ------------ Download ------------
+    def download(self, url, path, validators=None):
+        """Downloads url to path unless unchanged.
+
+        Returns (status, validators) with status 'downloaded', 'resumed' or 'unchanged'.
+        """
+        validators = validators or {}
+        part = path + ".part"
+        part_meta = part + ".json"
+        headers = {}
+
+        if os.path.exists(path):
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+
+        # Resume only if the remote file is still the one the partial file came from
+        offset = 0
+        if os.path.exists(part) and os.path.exists(part_meta):
+            with open(part_meta) as f:
+                part_validator = json.load(f).get("validator")
+            if part_validator:
+                offset = os.path.getsize(part)
+                headers["Range"] = f"bytes={offset}-"
+                headers["If-Range"] = part_validator
+
+        with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 304:
+                return "unchanged", validators
+            if response.status_code == 416:
+                # Partial file does not fit the remote file anymore, start over
+                os.remove(part)
+                os.remove(part_meta)
+                return self.download(url, path, validators)
+            response.raise_for_status()
+
+            size = response.headers.get("Content-Length")
+            if response.status_code == 206:
+                mode, status = "ab", "resumed"
+                total = offset + int(size) if size is not None else None
+            else:
+                mode, status = "wb", "downloaded"
+                total = int(size) if size is not None else None
+
+            new_validators = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "size": total,
+            }
+
+            # Server ignored the conditional headers, but size and validators match the local copy
+            if (status == "downloaded" and os.path.exists(path) and total is not None
+                    and os.path.getsize(path) == total
+                    and new_validators["etag"] == validators.get("etag")
+                    and new_validators["last_modified"] == validators.get("last_modified")):
+                return "unchanged", validators
+
+            with open(part_meta, "w") as f:
+                json.dump({"validator": new_validators["etag"] or new_validators["last_modified"]}, f)
+            with open(part, mode) as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    f.write(chunk)
+
+        if total is not None and os.path.getsize(part) != total:
+            raise IOError(f"Incomplete download of {url}: {os.path.getsize(part)} of {total} bytes")
+        os.replace(part, path)
+        os.remove(part_meta)
+        return status, new_validators
+
+    def _download_file(self, relative_path):
+        url = self.base_url + relative_path
+        path = os.path.join(self.target_dir, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.lock:
+            validators = dict(self.manifest.get(url, {}))
+        status, validators = self.download(url, path, validators)
+        with self.lock:
+            self.manifest[url] = validators
+        return relative_path, status
+
+    def mirror(self, platform_types=None, prefixes=None, bbox=None, refresh=False, verbose=True):
+        """Downloads all new or changed files concurrently and returns a status count."""
+        files = self.list_files(platform_types=platform_types, prefixes=prefixes, bbox=bbox, refresh=refresh)
+        counts = {"downloaded": 0, "resumed": 0, "unchanged": 0, "failed": 0}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._download_file, f): f for f in files}
+            for i, future in enumerate(tqdm(as_completed(futures), total=len(futures), desc="Download", disable=not verbose)):
+                try:
+                    _, status = future.result()
+                    counts[status] += 1
+                except (requests.RequestException, IOError) as e:
+                    counts["failed"] += 1
+                    print(f"Error: {futures[future]}: {e}")
+                # Persist progress regularly so an interrupted mirror keeps its validators
+                if i % 100 == 99:
+                    with self.lock:
+                        self._save_json(MANIFEST_FILE, self.manifest)
+
+        self._save_json(MANIFEST_FILE, self.manifest)
+        if verbose:
+            print(json.dumps(counts, indent=4))
+        return counts
+
+    def close(self):
+        self._save_json(MANIFEST_FILE, self.manifest)
+        self.session.close()
+
+
+if __name__ == '__main__':
+
+    downloader = InsituDownloader(target_dir="data/insitu", max_workers=8)
+    downloader.mirror(
+        platform_types=["TG/"],
+        prefixes=["NO"],
+        bbox={"min_lat": 53.10, "max_lat": 65.00, "min_lon": 9.10, "max_lon": 30.20},
+    )
+    downloader.close()
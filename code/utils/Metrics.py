@@ -0,0 +1,93 @@
+import sys
+import time
+import json
+import threading
+from contextlib import contextmanager
+
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageMetrics():
+    """Thread-safe registry of per-stage durations and row counts."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+
+    def record(self, stage, seconds, rows=None):
+        with self.lock:
+            entry = self.stages.setdefault(stage, {
+                "count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "last_seconds": 0.0,
+                "total_rows": 0, "last_rows": None,
+            })
+            entry["count"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            entry["last_seconds"] = seconds
+            if rows is not None:
+                entry["total_rows"] += rows
+                entry["last_rows"] = rows
+
+    def summary(self):
+        with self.lock:
+            result = {}
+            for stage, entry in self.stages.items():
+                entry = dict(entry)
+                entry["mean_seconds"] = entry["total_seconds"] / entry["count"]
+                has_rows = entry["total_rows"] > 0 and entry["total_seconds"] > 0
+                entry["rows_per_s"] = entry["total_rows"] / entry["total_seconds"] if has_rows else None
+                result[stage] = entry
+        return {"stages": result, "peak_rss_mb": peak_rss_mb()}
+
+    def print_report(self):
+        print(json.dumps(self.summary(), indent=4))
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+
+
+# Process-wide registry used by the scripts and fast-api.py
+METRICS = StageMetrics()
+
+
+class StageTimer():
+    def __init__(self, stage):
+        self.stage = stage
+        self.rows = None
+        self.seconds = None
+
+
+@contextmanager
+def stage_timer(stage, rows=None, verbose=False, registry=METRICS):
+    """Times a block; set `timer.rows` inside the block to also record throughput.
+
+        with stage_timer("upload_many", verbose=True) as timer:
+            db.upload_many(records)
+            timer.rows = len(records)
+    """
+    timer = StageTimer(stage)
+    timer.rows = rows
+    start = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        timer.seconds = time.perf_counter() - start
+        registry.record(stage, timer.seconds, timer.rows)
+        if verbose:
+            throughput = f", {timer.rows} rows ({timer.rows / timer.seconds:.0f} rows/s)" if timer.rows and timer.seconds > 0 else ""
+            rss = peak_rss_mb()
+            memory = f", peak RSS {rss:.0f} MB" if rss is not None else ""
+            print(f"[{stage}] {timer.seconds:.3f} s{throughput}{memory}")
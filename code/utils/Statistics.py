@@ -0,0 +1,165 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from utils.Cube import open_cube
+
+
+STATS_FILE = "stats.json"
+
+
+class RunningStats():
+    """NaN-aware per-feature mean/std/min/max collected in one streaming pass.
+
+    Each batch is reduced to (count, mean, M2, min, max) per feature and merged
+    into the running state with the parallel Welford update (Chan et al.), so
+    memory stays O(features) no matter how much data is streamed through.
+    `method` ("standard" or "minmax") is the scaling stored with the artifact
+    and used by transform() unless another method is passed explicitly.
+    """
+
+    def __init__(self, names: list, method="standard"):
+        self.names = list(names)
+        self.method = method
+        n = len(self.names)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n, dtype=np.float64)
+        self.m2 = np.zeros(n, dtype=np.float64)
+        self.min = np.full(n, np.inf, dtype=np.float64)
+        self.max = np.full(n, -np.inf, dtype=np.float64)
+
+    def update(self, values):
+        """Adds a batch of shape (..., features)."""
+        values = np.asarray(values, dtype=np.float64).reshape(-1, len(self.names))
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        has_data = count > 0
+        if not has_data.any():
+            return self
+
+        safe_count = np.maximum(count, 1)
+        mean = np.where(valid, values, 0.0).sum(axis=0) / safe_count
+        m2 = np.where(valid, (values - mean) ** 2, 0.0).sum(axis=0)
+
+        total = self.count + count
+        delta = mean - self.mean
+        safe_total = np.maximum(total, 1)
+        self.mean = np.where(has_data, self.mean + delta * count / safe_total, self.mean)
+        self.m2 = np.where(has_data, self.m2 + m2 + delta ** 2 * self.count * count / safe_total, self.m2)
+        self.count = total
+
+        with np.errstate(invalid="ignore"):
+            self.min = np.fmin(self.min, np.nanmin(np.where(valid, values, np.inf), axis=0))
+            self.max = np.fmax(self.max, np.nanmax(np.where(valid, values, -np.inf), axis=0))
+        return self
+
+    @property
+    def std(self):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.sqrt(self.m2 / self.count)
+
+    # ------------ Apply ------------
+    def _scale(self, method=None):
+        method = method or self.method
+        if method == "standard":
+            offset, scale = self.mean, self.std
+        elif method == "minmax":
+            offset, scale = self.min, self.max - self.min
+        else:
+            raise ValueError(f"Unknown normalisation method: {method}")
+        # Constant or empty features are passed through unscaled
+        scale = np.where(np.isfinite(scale) & (scale > 0), scale, 1.0)
+        offset = np.where(np.isfinite(offset), offset, 0.0)
+        return offset.astype(np.float32), scale.astype(np.float32)
+
+    def transform(self, values, method=None):
+        offset, scale = self._scale(method)
+        return (np.asarray(values, dtype=np.float32) - offset) / scale
+
+    def inverse_transform(self, values, method=None):
+        offset, scale = self._scale(method)
+        return np.asarray(values, dtype=np.float32) * scale + offset
+
+    # ------------ Serialisation ------------
+    def to_dict(self):
+        return {
+            name: {
+                "count": int(self.count[i]),
+                "mean": float(self.mean[i]),
+                "std": float(self.std[i]) if self.count[i] else None,
+                "min": float(self.min[i]) if self.count[i] else None,
+                "max": float(self.max[i]) if self.count[i] else None,
+                "m2": float(self.m2[i]),
+            }
+            for i, name in enumerate(self.names)
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, method="standard"):
+        stats = cls(list(data.keys()), method=method)
+        for i, name in enumerate(stats.names):
+            entry = data[name]
+            stats.count[i] = entry["count"]
+            stats.mean[i] = entry["mean"]
+            stats.m2[i] = entry["m2"]
+            stats.min[i] = entry["min"] if entry["min"] is not None else np.inf
+            stats.max[i] = entry["max"] if entry["max"] is not None else -np.inf
+        return stats
+
+
+def save_stats(path, feature_stats: RunningStats, target_stats: RunningStats):
+    with open(path, "w") as f:
+        json.dump({
+            "method": feature_stats.method,
+            "features": feature_stats.to_dict(),
+            "target": target_stats.to_dict(),
+        }, f, indent=4)
+
+
+def load_stats(path):
+    """Returns (feature_stats, target_stats) from a saved artifact or a cube directory."""
+    if os.path.isdir(path):
+        path = os.path.join(path, STATS_FILE)
+    with open(path) as f:
+        data = json.load(f)
+    method = data.get("method", "standard")
+    return RunningStats.from_dict(data["features"], method), RunningStats.from_dict(data["target"], method)
+
+
+def compute_cube_stats(path, end=None, chunk_hours=24 * 7, method="standard", save=True, verbose=False):
+    """Streams over a cube in time chunks; pass end to restrict the statistics to the training period."""
+    cube = open_cube(path)
+    features, target = cube["features"], cube["target"]
+    last = len(cube["time"]) if end is None else int(cube["time"].searchsorted(pd.Timestamp(end), side="right"))
+
+    feature_stats = RunningStats(cube["feature_names"], method=method)
+    target_stats = RunningStats([cube["meta"]["target"]], method=method)
+    for i in tqdm(range(0, last, chunk_hours), desc="Computing statistics", disable=not verbose):
+        j = min(i + chunk_hours, last)
+        feature_stats.update(features[i:j])
+        target_stats.update(target[i:j])
+
+    if save:
+        save_stats(os.path.join(path, STATS_FILE), feature_stats, target_stats)
+    return feature_stats, target_stats
+
+
+def compute_frame_stats(frames, features: list, target="sla", method="standard", verbose=False):
+    """Streams over DataFrames from utils.Database or utils.Archive reads."""
+    feature_stats = RunningStats(features, method=method)
+    target_stats = RunningStats([target], method=method)
+    for df in tqdm(frames, desc="Computing statistics", disable=not verbose):
+        if df is None or df.empty:
+            continue
+        feature_stats.update(df.reindex(columns=features).to_numpy(dtype=np.float64))
+        target_stats.update(df.reindex(columns=[target]).to_numpy(dtype=np.float64))
+    return feature_stats, target_stats
+
+
+if __name__ == '__main__':
+
+    feature_stats, target_stats = compute_cube_stats("data/cube-test", verbose=True)
+    print(json.dumps(feature_stats.to_dict(), indent=4))
+    print(json.dumps(target_stats.to_dict(), indent=4))
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+import torch
+from torch.utils.data import Dataset, DataLoader
+
+from utils.Cube import open_cube
+from utils.Statistics import load_stats
+
+
+class OceanWindowDataset(Dataset):
+    """Sliding-window dataset over a cube written by utils.Cube.CubeBuilder.
+
+    Replaces OceanDataset.create_sequences from the notebooks: instead of
+    materialising every window, only the window start indices are stored and
+    each sample is sliced from the memory-mapped cube on access. The memmap is
+    opened lazily so every DataLoader worker gets its own file handle.
+
+    A sample is (X, y, x_time, y_time) with
+        X: (input_size, lat, lon, features) float32
+        y: (horizon,) float32
+        x_time, y_time: int64 nanoseconds since epoch of the input/target steps
+
+    If stats is given (artifact path, cube directory or a (feature_stats,
+    target_stats) tuple from utils.Statistics), X and y are normalised on the
+    fly with the method recorded in the stats before NaNs are replaced by
+    fill_value, so training and serving scale identically.
+    """
+
+    def __init__(self, path, input_size=24, horizon=6, stride=1, start=None, end=None,
+                 fill_value=0.0, drop_nan_target=True, stats=None, normalize=None):
+        self.path = path
+        self.input_size = input_size
+        self.horizon = horizon
+        self.stride = stride
+        self.fill_value = fill_value
+        self._cube = None
+
+        if isinstance(stats, str):
+            stats = load_stats(stats)
+        self.feature_stats, self.target_stats = stats if stats is not None else (None, None)
+        if self.feature_stats is not None:
+            if normalize is not None and normalize != self.feature_stats.method:
+                raise ValueError(f"normalize={normalize} differs from the stats method {self.feature_stats.method}; "
+                                 "recompute the stats with method=normalize")
+            normalize = self.feature_stats.method
+        self.normalize = normalize
+
+        cube = open_cube(path)
+        self.time = cube["time"]
+        self.feature_names = cube["feature_names"]
+        self.shape = cube["features"].shape
+
+        # Window [i, i + input_size + horizon) must lie completely inside [start, end]
+        first = 0 if start is None else int(self.time.searchsorted(pd.Timestamp(start), side="left"))
+        last = len(self.time) if end is None else int(self.time.searchsorted(pd.Timestamp(end), side="right"))
+        window = input_size + horizon
+        starts = np.arange(first, max(last - window + 1, first), stride, dtype=np.int64)
+
+        if drop_nan_target and len(starts):
+            nan_target = np.isnan(np.asarray(cube["target"], dtype=np.float32))
+            nan_cumsum = np.concatenate([[0], np.cumsum(nan_target)])
+            y_from = starts + input_size
+            starts = starts[(nan_cumsum[y_from + horizon] - nan_cumsum[y_from]) == 0]
+
+        self.starts = starts
+        self.time_ns = self.time.values.astype("datetime64[ns]").astype(np.int64)
+
+    @property
+    def cube(self):
+        if self._cube is None:
+            self._cube = open_cube(self.path)
+        return self._cube
+
+    def __getstate__(self):
+        # Do not pickle open memmaps into DataLoader workers
+        state = self.__dict__.copy()
+        state["_cube"] = None
+        return state
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, idx):
+        i = int(self.starts[idx])
+        j = i + self.input_size
+        k = j + self.horizon
+
+        X = np.array(self.cube["features"][i:j], dtype=np.float32)
+        y = np.array(self.cube["target"][j:k], dtype=np.float32)
+        if self.feature_stats is not None:
+            X = self.feature_stats.transform(X, self.normalize)
+            y = self.target_stats.transform(y[:, None], self.normalize)[:, 0]
+        if self.fill_value is not None:
+            np.nan_to_num(X, copy=False, nan=self.fill_value)
+
+        return (
+            torch.from_numpy(X),
+            torch.from_numpy(y),
+            torch.from_numpy(self.time_ns[i:j].copy()),
+            torch.from_numpy(self.time_ns[j:k].copy()),
+        )
+
+    def get_times(self, idx):
+        """Returns the input and target timestamps of a sample as DatetimeIndex."""
+        i = int(self.starts[idx])
+        j = i + self.input_size
+        return self.time[i:j], self.time[j:j + self.horizon]
+
+    def inverse_transform_target(self, y):
+        """Maps normalised predictions back to metres."""
+        if self.target_stats is None:
+            return np.asarray(y)
+        y = np.asarray(y, dtype=np.float32)
+        return self.target_stats.inverse_transform(y.reshape(-1, 1), self.normalize).reshape(y.shape)
+
+
+def make_splits(path, train_end, val_end, input_size=24, horizon=6, stride=1, **kwargs):
+    """Creates train/val/test datasets split in time at train_end and val_end."""
+    train_end = pd.Timestamp(train_end)
+    val_end = pd.Timestamp(val_end)
+    one_ns = pd.Timedelta(1, unit="ns")
+    train = OceanWindowDataset(path, input_size, horizon, stride, end=train_end - one_ns, **kwargs)
+    val = OceanWindowDataset(path, input_size, horizon, stride, start=train_end, end=val_end - one_ns, **kwargs)
+    test = OceanWindowDataset(path, input_size, horizon, stride, start=val_end, **kwargs)
+    return train, val, test
+
+
+def create_dataloader(dataset, batch_size=16, shuffle=True, num_workers=0):
+    return DataLoader(
+        dataset,
+        batch_size=batch_size,
+        shuffle=shuffle,
+        num_workers=num_workers,
+        persistent_workers=num_workers > 0,
+    )
+
+
+if __name__ == '__main__':
+
+    from utils.Statistics import compute_cube_stats
+
+    # Statistics from the training period only, shared by all splits and by serving
+    stats = compute_cube_stats("data/cube-test", end="2025-01-02")
+    train, val, test = make_splits("data/cube-test", train_end="2025-01-02", val_end="2025-01-02 12:00",
+                                   input_size=6, horizon=3, stats=stats)
+    print(len(train), len(val), len(test))
+
+    loader = create_dataloader(train, batch_size=4, num_workers=2)
+    X, y, x_time, y_time = next(iter(loader))
+    print(X.shape, y.shape, pd.to_datetime(x_time[0].numpy()))
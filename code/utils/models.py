@@ -0,0 +1,81 @@
+import torch
+import torch.nn as nn
+
+
+class OceanWaterLevelPredictor(nn.Module):
+    def __init__(self, X_data, hidden_dim=64, num_layers=2, forecast_horizon=6):
+        super(OceanWaterLevelPredictor, self).__init__()
+
+        self.forecast_horizon = forecast_horizon  # Dynamische Vorhersagedauer
+
+        # X_data darf ein Tensor oder nur dessen Shape (Batch, Time, Lat, Lon, Features) sein
+        input_shape = tuple(X_data.shape) if hasattr(X_data, "shape") else tuple(X_data)
+        in_channels = input_shape[-1]
+
+        # Convolutional Block (räumliche Merkmale extrahieren)
+        self.conv1 = nn.Conv2d(in_channels=in_channels, out_channels=32, kernel_size=3, padding=1)
+        self.conv2 = nn.Conv2d(in_channels=32, out_channels=64, kernel_size=3, padding=1)
+        self.pool = nn.MaxPool2d(2, 2)
+        self.relu = nn.ReLU()
+
+        # Berechnung der CNN-Ausgabegröße für LSTM
+        self.lstm_input_size = self._get_lstm_input_size(input_shape)
+
+        # LSTM Block (zeitliche Abhängigkeiten lernen)
+        self.lstm = nn.LSTM(input_size=self.lstm_input_size, hidden_size=hidden_dim, num_layers=num_layers, batch_first=True)
+
+        # Fully Connected Layer (Endvorhersage)
+        self.fc = nn.Linear(hidden_dim, self.forecast_horizon)  # Dynamisch anpassbare Stunden-Vorhersage
+
+    def _get_lstm_input_size(self, input_shape):
+        """Berechnet die korrekte input_size für das LSTM anhand der CNN-Ausgabegröße"""
+        with torch.no_grad():  # Kein Gradient-Tracking nötig
+            _, _, lat, lon, features = input_shape
+
+            # Dummy-Eingabe mit (1, Features, H, W)
+            dummy_input = torch.zeros(1, features, lat, lon)
+
+            # CNN-Durchlauf
+            x = self.pool(self.relu(self.conv1(dummy_input)))
+            x = self.pool(self.relu(self.conv2(x)))
+
+            _, c, h, w = x.shape  # Output-Shape nach CNN
+            return c * h * w  # LSTM-Eingangsgröße berechnen
+
+    def forward(self, x):
+        batch_size, time_steps, lat, lon, features = x.shape
+
+        # CNN Feature Extraction
+        x = x.view(batch_size * time_steps, features, lat, lon)  # Zeit + Batch für CNN kombinieren
+        x = self.pool(self.relu(self.conv1(x)))
+        x = self.pool(self.relu(self.conv2(x)))
+
+        # Reshape für LSTM
+        x = x.view(batch_size, time_steps, -1)  # (Batch, Zeit, Features)
+
+        # LSTM für Sequenzverarbeitung
+        x, _ = self.lstm(x)
+
+        # Letzten Zeitschritt nehmen und durch FC-Schicht für flexible Vorhersage
+        x = self.fc(x[:, -1, :])
+
+        return x  # Ausgabeform: (Batch, forecast_horizon)
+
+
+def load_model(path, map_location="cpu"):
+    """Loads a TorchScript archive, falling back to a pickled nn.Module saved with torch.save."""
+    try:
+        model = torch.jit.load(path, map_location=map_location)
+    except RuntimeError:
+        model = torch.load(path, map_location=map_location, weights_only=False)
+    model.eval()
+    return model
+
+
+def export_torchscript(model, example_input, path):
+    """Traces a trained model for serving; example_input has shape (1, T, Lat, Lon, Features)."""
+    model.eval()
+    with torch.no_grad():
+        traced = torch.jit.trace(model, example_input)
+    traced.save(path)
+    return path